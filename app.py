@@ -1,49 +1,234 @@
 # ============================================================================
 # app.py
-# This is the main Flask application file for the MCQ Quiz Game
+# This is the main Quart application file for the MCQ Quiz Game
 # It handles all routes, session management, and connects frontend with backend
+# Quart is async (ASGI), so slow LLM and database calls do not block other users
 # ============================================================================
 
-# Import the Flask class to create our web application
-from flask import Flask
+# Import asyncio so blocking work (MySQL queries) can run in a thread
+# without stalling the event loop that serves every other request
+import asyncio
+
+# Import gzip to compress large responses before sending them
+import gzip
+
+# Import os module to read settings from environment variables
+import os
+
+# Import secrets to make random, unguessable IDs for stored quizzes
+import secrets
+
+# Import load_dotenv to load settings (like REDIS_URL) from the .env file
+from dotenv import load_dotenv
+
+# Import orjson, a much faster JSON library than Python's built-in json
+# It writes bytes directly, so responses skip an extra encode step
+import orjson
+
+# Import the Quart class to create our web application
+# Quart is the async (ASGI) version of Flask with nearly the same API
+from quart import Quart
 
 # Import render_template to serve HTML pages
-from flask import render_template
+from quart import render_template
 
 # Import request to access data sent from the frontend (forms, JSON, etc.)
-from flask import request
+from quart import request
 
 # Import jsonify to convert Python dictionaries to JSON responses
-from flask import jsonify
+from quart import jsonify
 
 # Import session to store user data between requests (like login status)
-from flask import session
+from quart import session
 
 # Import redirect to send users to different pages
-from flask import redirect
+from quart import redirect
 
 # Import url_for to generate URLs for routes
-from flask import url_for
+from quart import url_for
+
+# Import make_response to build a response we can add headers to
+from quart import make_response
+
+# Import Blueprint to group the page routes and the API routes
+# Each group gets its own error handlers, so a 404 inside /api/ is answered
+# with JSON without checking the URL by hand
+from quart import Blueprint
+
+# Import abort to stop a request with an HTTP error (like 404)
+from quart import abort
+
+# Import g to keep per-request data (like the logged in user's ID)
+from quart import g
+
+# Import Response to send the streamed quiz as Server-Sent Events
+from quart import Response
+
+# Import the default JSON provider so we can swap in orjson below
+from quart.json.provider import DefaultJSONProvider
+
+# Import the signer (installed with Quart) that protects the streamed quiz
+# token from being changed by the browser, and the error for a bad token
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+
+# Import msgspec for the errors raised when request JSON is missing or wrong
+import msgspec
+
+# Import the request schemas that read and check the JSON sent to the API
+import schemas
 
 # Import our database functions from database.py
+# Most of these use the blocking MySQL driver, so routes call them through
+# asyncio.to_thread to keep the event loop free while a query runs
+# The read functions ending in _async use aiomysql and are awaited directly
 import database
 
-# Import our MCQ generator function from mcq_generator.py
-from mcq_generator import generate_quiz
+# Import our async MCQ generator function from mcq_generator.py
+# get_quiz reuses cached quizzes for topics that were asked for recently
+# get_quiz_stream does the same but hands out each question as soon as it is ready
+from mcq_generator import get_quiz, get_quiz_stream
 
 # ============================================================================
-# FLASK APP CONFIGURATION
+# QUART APP CONFIGURATION
 # ============================================================================
 
-# Create a Flask application instance
-# __name__ tells Flask where to look for templates and static files
-app = Flask(__name__)
+# Load environment variables from the .env file
+load_dotenv()
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider that uses orjson instead of the built-in json module.
+    
+    jsonify() and request.get_json() both go through the app's JSON provider,
+    so every /api/* response and request body uses orjson with this in place.
+    Values orjson does not know (like the Decimal win_rate from MySQL) fall
+    back to the default provider's conversion, so the JSON stays the same.
+    """
+    
+    def dumps(self, obj, **kwargs):
+        # Convert a Python object to a JSON string
+        # (used by the session cookie and anything calling json.dumps)
+        return orjson.dumps(obj, default=self.default).decode("utf-8")
+    
+    def loads(self, s, **kwargs):
+        # Convert a JSON string or bytes back to a Python object
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Build the JSON response for jsonify()
+        # orjson already gives bytes, so they are sent as they are
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default),
+            mimetype=self.mimetype
+        )
+
+
+# Create a Quart application instance
+# __name__ tells Quart where to look for templates and static files
+app = Quart(__name__)
+
+# Use orjson for all JSON responses and request bodies
+app.json = OrjsonProvider(app)
 
 # Set a secret key for session management
 # This key is used to encrypt session data stored in cookies
 # In production, this should be a long random string kept secret
 app.secret_key = "mcq_quiz_game_secret_key_2024"
 
+# Store sessions in Redis when a REDIS_URL is configured (see .env.example)
+# By default the whole session (including the current quiz) is signed and
+# sent back and forth in the cookie on every request. With Redis the cookie
+# only holds a short session ID and the data stays on the server.
+# Without REDIS_URL the normal cookie sessions are used, so the app still
+# runs with nothing but XAMPP installed.
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Redis connection used to store each player's active quiz (see save_active_quiz)
+# Stays None without REDIS_URL, and the quiz is kept in the session instead
+quiz_store = None
+
+if REDIS_URL:
+    # Import the server-side session extension only when it is needed
+    from quart_session import Session
+    
+    # Keep session data in Redis at the given address
+    app.config["SESSION_TYPE"] = "redis"
+    app.config["SESSION_URI"] = REDIS_URL
+    
+    # Sign the session ID cookie so it cannot be guessed or tampered with
+    app.config["SESSION_USE_SIGNER"] = True
+    
+    # End the session when the browser closes, like the cookie sessions do
+    app.config["SESSION_PERMANENT"] = False
+    
+    # Switch the app over to server-side sessions
+    # Session data is saved as JSON (never pickle), so a tampered Redis
+    # value cannot run code when it is loaded
+    Session(app)
+    
+    # Import the async Redis client only when it is needed
+    import redis.asyncio
+    
+    # Connect to the same Redis server for the quiz store
+    # (the connection is only opened when it is first used)
+    quiz_store = redis.asyncio.from_url(REDIS_URL)
+
+# How long (in seconds) a generated quiz can wait in Redis to be submitted
+QUIZ_STORE_SECONDS = 30 * 60
+
+# Signs the quiz sent at the end of a streamed quiz (see api_generate_game_stream)
+# The session cookie is already sent before a streamed reply starts, so the
+# finished quiz is handed to the browser signed with the secret key, and the
+# browser passes it to /api/game/start to make it the active quiz
+quiz_signer = URLSafeTimedSerializer(app.secret_key, salt="streamed-quiz")
+
+# How long (in seconds) the browser may reuse a page without asking again
+# The pages are empty shells (all data is loaded by JavaScript from /api/*),
+# so the same HTML is correct for every logged in user
+PAGE_CACHE_SECONDS = 300
+
+# Endpoints that can be used without being logged in
+# Every other route is protected by the require_login check below
+# Endpoint names start with their blueprint's name ("pages." or "api.")
+PUBLIC_ENDPOINTS = frozenset({
+    "pages.index",          # Redirects to login or home
+    "pages.login_page",     # The login/signup page
+    "api.api_signup",       # Creating an account
+    "api.api_login",        # Logging in
+    "api.api_logout",       # Logging out (harmless when already logged out)
+    "api.api_not_found",    # Unknown /api/ URLs (answered with a JSON 404)
+    "static"                # CSS and JavaScript files
+})
+
+# Rendered HTML for each page template, filled in the first time a page is served
+# The templates have no per-user data, so rendering them once is enough
+_rendered_pages = {}
+
+# Responses smaller than this many bytes are sent without compression
+# (for tiny responses the gzip header would cost more than it saves)
+COMPRESS_MIN_SIZE = 500
+
+# Types of responses that are worth compressing
+# (text compresses very well; images and other binaries do not)
+COMPRESS_MIMETYPES = frozenset({
+    "text/html",                # Pages
+    "text/css",                 # Stylesheets
+    "text/javascript",          # JavaScript files
+    "application/javascript",   # JavaScript files (older type name)
+    "application/json"          # Every /api/* response
+})
+
+# Ready-made JSON bodies for the fixed error replies, keyed by their message
+# Messages like "No data received" are sent by many routes, so each body
+# is encoded once instead of building and encoding a new dict every time
+_error_bodies = {}
+
+# URLs of the pages we redirect to, filled in the first time each is needed
+# The URLs never change while the app runs, so url_for only walks the
+# URL map once per page instead of on every redirect
+_page_urls = {}
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
@@ -57,27 +242,419 @@ def is_logged_in():
         bool: True if user is logged in, False otherwise
     """
     
-    # Check if 'user_id' key exists in the session
+    # Look up 'user_id' in the session once
     # If it exists and has a value, the user is logged in
-    return "user_id" in session and session["user_id"] is not None
+    return session.get("user_id") is not None
+
+def page_url(endpoint):
+    """
+    Gets the URL for one of our routes (like "pages.login_page").
+    The URL is worked out with url_for the first time and reused after that.
+    Quart can only run url_for inside a request, so it cannot be done when
+    the app starts.
+    
+    Args:
+        endpoint: The name of the route function
+    
+    Returns:
+        str: The URL of the route (e.g. "/login")
+    """
+    
+    # Look up the URL we worked out earlier for this route
+    url = _page_urls.get(endpoint)
+    
+    # Work it out with url_for if this is the first time it is needed
+    if url is None:
+        url = url_for(endpoint)
+        _page_urls[endpoint] = url
+    
+    # Return the URL
+    return url
+
+def error_response(message, status_code):
+    """
+    Builds a JSON error reply like {"success": false, "message": "..."}.
+    The JSON for each message is encoded the first time it is sent and the
+    same bytes are reused after that.
+    
+    Args:
+        message: The error message shown to the user
+        status_code: The HTTP status code (e.g. 400 or 401)
+    
+    Returns:
+        Response: The JSON error response
+    """
+    
+    # Look up the JSON we encoded earlier for this message
+    body = _error_bodies.get(message)
+    
+    # Encode it if this is the first time the message is sent
+    if body is None:
+        body = orjson.dumps({"success": False, "message": message})
+        _error_bodies[message] = body
+    
+    # Every request still gets its own response object, because headers
+    # (like compression) are added to it after the route returns
+    return app.response_class(body, status=status_code, mimetype="application/json")
 
 def get_current_user_id():
     """
     Gets the user_id of the currently logged in user.
+    require_login stores it on g, so the session does not need to be read again.
     
     Returns:
         int: The user_id if logged in, None otherwise
     """
     
-    # Return the user_id from session, or None if not logged in
-    return session.get("user_id", None)
+    # Return the user_id saved by require_login, or None if it was not set
+    return g.get("user_id", None)
+
+def get_page_args(default_limit):
+    """
+    Reads the optional ?limit= and ?offset= query parameters used by the
+    list routes (history and leaderboard) to ask for one page of results.
+    Missing or invalid values fall back to the first page.
+    
+    Args:
+        default_limit: The page size to use, which is also the largest
+                       page a client may ask for
+    
+    Returns:
+        tuple: (limit, offset) ready to pass to the database function
+    """
+    
+    # Read both values as numbers (type=int gives the default for bad values)
+    limit = request.args.get("limit", default_limit, type=int)
+    offset = request.args.get("offset", 0, type=int)
+    
+    # Keep the page between 1 and default_limit entries, so a client cannot
+    # ask for the whole table at once
+    limit = min(max(limit, 1), default_limit)
+    
+    # An offset below 0 makes no sense, so start from the first entry
+    offset = max(offset, 0)
+    
+    # Return both values
+    return limit, offset
+
+async def save_active_quiz(quiz):
+    """
+    Saves the quiz the player is about to answer, so it can be graded later.
+    With Redis the quiz is stored under a random ID and only that short ID
+    goes into the session. Without Redis the quiz goes into the session
+    itself, because it is the only place every worker process can read it.
+    
+    Args:
+        quiz: Dictionary with the topic and what is needed to grade the answers
+    """
+    
+    # Without Redis, keep the quiz in the session
+    if quiz_store is None:
+        session["quiz"] = quiz
+        return
+    
+    # Remove the quiz the player did not finish, if there is one
+    old_quiz_id = session.get("quiz_id")
+    if old_quiz_id is not None:
+        await quiz_store.delete(f"quiz:{old_quiz_id}")
+    
+    # Make a random ID (12 characters) that nobody can guess
+    quiz_id = secrets.token_urlsafe(9)
+    
+    # Store the quiz as JSON; Redis deletes it by itself once it expires
+    await quiz_store.set(f"quiz:{quiz_id}", orjson.dumps(quiz), ex=QUIZ_STORE_SECONDS)
+    
+    # Only the ID is kept in the session
+    session["quiz_id"] = quiz_id
+
+async def issue_quiz_nonce():
+    """
+    Makes a one-time code for the next streamed quiz token.
+    /api/game/start accepts a token only while its code is unused, so a
+    token cannot be replayed to start (and submit) the same quiz again.
+    With Redis the code is stored there until it expires. Without Redis it
+    goes into the session, which is possible because this runs before the
+    streamed reply (and its session cookie) is sent.
+    
+    Returns:
+        str: The random code to put in the quiz token
+    """
+    
+    # Make a random code (12 characters) that nobody can guess
+    nonce = secrets.token_urlsafe(9)
+    
+    # Without Redis, keep the code in the session
+    # (only the newest streamed quiz of a player can be started)
+    if quiz_store is None:
+        session["quiz_nonce"] = nonce
+        return nonce
+    
+    # Store the code; Redis deletes it by itself once it expires, at the
+    # same time the token itself stops being accepted
+    await quiz_store.set(f"quiz_nonce:{nonce}", 1, ex=QUIZ_STORE_SECONDS)
+    return nonce
+
+async def use_quiz_nonce(nonce):
+    """
+    Uses up the one-time code made by issue_quiz_nonce.
+    
+    Args:
+        nonce: The code read from the quiz token
+    
+    Returns:
+        bool: True the first time a valid code is used, False after that
+    """
+    
+    # Without Redis the code is in the session; pop removes it in one step
+    if quiz_store is None:
+        return session.pop("quiz_nonce", None) == nonce
+    
+    # DELETE removes the code and says how many keys it removed, in one
+    # atomic step, so two requests with the same token cannot both get 1
+    return await quiz_store.delete(f"quiz_nonce:{nonce}") == 1
+
+def quiz_for_grading(topic, questions):
+    """
+    Keeps only what is needed to grade a quiz later (see save_active_quiz).
+    The option texts are never needed again, so leaving them out makes the
+    stored quiz about 5x smaller.
+    
+    Args:
+        topic: The quiz topic
+        questions: The list of question objects
+    
+    Returns:
+        dict: The topic, correct letters, question texts and difficulty levels
+    """
+    
+    # "correct" is one lowercase letter per question, e.g. "abdcabadcb"
+    # ("?" keeps the letters lined up if the AI left an answer blank)
+    return {
+        "topic": topic,                                  # For the results page
+        "correct": "".join(q["correct"].strip().lower()[:1] or "?" for q in questions),
+        "qtext": [q["question"] for q in questions],     # Question texts
+        "diff": [q["difficulty"] for q in questions]     # Difficulty levels
+    }
+
+def sse_event(event, data):
+    """
+    Builds one Server-Sent Event: an "event:" line, a "data:" line with the
+    JSON and an empty line that tells the browser the event is complete.
+    
+    Args:
+        event: The name of the event (e.g. "question")
+        data: The value to send as JSON
+    
+    Returns:
+        bytes: The event, ready to be sent
+    """
+    
+    # orjson gives bytes, so the event is put together as bytes too
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+async def load_active_quiz():
+    """
+    Gets the quiz saved by save_active_quiz for the current player.
+    
+    Returns:
+        dict: The saved quiz, or None if there is no active quiz
+    """
+    
+    # Without Redis the quiz is in the session
+    if quiz_store is None:
+        return session.get("quiz")
+    
+    # Look up the ID of the player's quiz
+    quiz_id = session.get("quiz_id")
+    if quiz_id is None:
+        return None
+    
+    # Fetch the quiz from Redis (None if it expired)
+    data = await quiz_store.get(f"quiz:{quiz_id}")
+    if data is None:
+        return None
+    
+    # Turn the stored JSON back into a dictionary
+    return orjson.loads(data)
+
+async def clear_active_quiz():
+    """
+    Removes the current player's quiz once it has been submitted.
+    """
+    
+    # Without Redis the quiz is in the session
+    if quiz_store is None:
+        session.pop("quiz", None)
+        return
+    
+    # Remove the stored quiz and its ID from the session
+    quiz_id = session.pop("quiz_id", None)
+    if quiz_id is not None:
+        await quiz_store.delete(f"quiz:{quiz_id}")
+
+async def render_page(template_name, cache=True):
+    """
+    Serves one of the HTML page templates.
+    The template is rendered by Jinja only once and the finished HTML is
+    reused for every later request, since the pages never change.
+    
+    Args:
+        template_name: The file name of the template (e.g. "home.html")
+        cache: Whether the browser may keep its own copy for a few minutes
+    
+    Returns:
+        Response: The HTML page
+    """
+    
+    # Look up the HTML we rendered earlier for this template
+    html = _rendered_pages.get(template_name)
+    
+    # Render the template if this is the first request for it
+    # In debug mode we always re-render so template edits show up immediately
+    if html is None or app.debug:
+        html = await render_template(template_name)
+        _rendered_pages[template_name] = html
+    
+    # Build the response from the finished HTML
+    response = await make_response(html)
+    
+    # Let the browser reuse the page for a few minutes without a round trip
+    # "private" keeps shared proxies from storing pages meant for logged in users
+    if cache:
+        response.headers["Cache-Control"] = f"private, max-age={PAGE_CACHE_SECONDS}"
+        
+        # Once that time is up the browser asks again with the page's ETag,
+        # and gets an empty 304 reply if the page has not changed
+        return await with_etag(response)
+    
+    # Return the page
+    return response
+
+async def with_etag(response):
+    """
+    Adds an ETag (a fingerprint of the body) to a response and answers with
+    "304 Not Modified" and no body when the browser already has that version.
+    The browser sends the ETag it saw last time in the If-None-Match header.
+    
+    Args:
+        response: The finished response for the current request
+    
+    Returns:
+        Response: The same response, or an empty 304 if nothing changed
+    """
+    
+    # Fingerprint the body (weak, because compression changes the bytes
+    # sent but not the content)
+    await response.add_etag(weak=True)
+    
+    # Compare with If-None-Match and turn the response into a 304 if it matches
+    return await response.make_conditional(request)
+
+# ============================================================================
+# LOGIN CHECK (runs before every request)
+# ============================================================================
+
+@app.before_request
+async def require_login():
+    """
+    Makes sure the user is logged in before any protected route runs.
+    Pages redirect to the login page and API routes return a 401 error.
+    For logged in users the user_id is saved on g for the route to use.
+    
+    Returns:
+        None to let the request continue, or the error/redirect response
+    """
+    
+    # Let public routes through, along with unknown URLs
+    # (unknown URLs have no endpoint and are handled by the 404 handler)
+    if request.endpoint is None or request.endpoint in PUBLIC_ENDPOINTS:
+        return None
+    
+    # Read the user_id from the session once for the whole request
+    user_id = session.get("user_id")
+    
+    # Reject the request if nobody is logged in
+    if user_id is None:
+        # API routes get a JSON error the frontend can react to
+        # (request.blueprint is the name of the blueprint the route belongs to)
+        if request.blueprint == "api":
+            return error_response("Not logged in", 401)
+        
+        # Pages redirect to the login page
+        return redirect(page_url("pages.login_page"))
+    
+    # Save the user_id so routes can read it with get_current_user_id()
+    g.user_id = user_id
+    
+    # Let the request continue to its route
+    return None
+
+# ============================================================================
+# RESPONSE COMPRESSION (runs after every request)
+# ============================================================================
+
+@app.after_request
+async def compress_response(response):
+    """
+    Gzip-compresses large text and JSON responses for browsers that accept it.
+    History and leaderboard JSON grows as more games are played, and on a
+    slow connection sending the bytes takes longer than building them.
+    
+    Args:
+        response: The response returned by the route
+    
+    Returns:
+        Response: The same response, compressed when it is worth it
+    """
+    
+    # Only compress normal, complete responses of a text type
+    # (304 replies have no body and range requests need the original bytes)
+    if response.status_code != 200 or response.mimetype not in COMPRESS_MIMETYPES:
+        return response
+    
+    # Leave responses alone if they are already encoded
+    if "Content-Encoding" in response.headers:
+        return response
+    
+    # Only compress if the browser said it can unzip gzip
+    if "gzip" not in request.headers.get("Accept-Encoding", "").lower():
+        return response
+    
+    # Caches must keep separate copies for browsers with and without gzip
+    response.vary.add("Accept-Encoding")
+    
+    # Get the full body of the response
+    data = await response.get_data(as_text=False)
+    
+    # Small responses are not worth compressing
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    
+    # Replace the body with the compressed version
+    # Level 6 is gzip's usual balance between speed and size
+    response.set_data(gzip.compress(data, compresslevel=6))
+    
+    # Tell the browser the body is gzip-compressed
+    response.headers["Content-Encoding"] = "gzip"
+    
+    # A strong ETag promises the exact same bytes, which is no longer true,
+    # so turn it into a weak one (static files come with strong ETags)
+    etag, is_weak = response.get_etag()
+    if etag is not None and not is_weak:
+        response.set_etag(etag, weak=True)
+    
+    # Return the compressed response
+    return response
 
 # ============================================================================
 # PAGE ROUTES (Serve HTML Templates)
 # ============================================================================
 
-@app.route("/")
-def index():
+# Blueprint that holds every HTML page
+pages_bp = Blueprint("pages", __name__)
+
+@pages_bp.route("/")
+async def index():
     """
     Root route - redirects to appropriate page based on login status.
     If logged in, go to home page. If not, go to login page.
@@ -86,13 +663,13 @@ def index():
     # Check if user is logged in
     if is_logged_in():
         # Redirect to home page if logged in
-        return redirect(url_for("home_page"))
+        return redirect(page_url("pages.home_page"))
     else:
         # Redirect to login page if not logged in
-        return redirect(url_for("login_page"))
+        return redirect(page_url("pages.login_page"))
 
-@app.route("/login")
-def login_page():
+@pages_bp.route("/login")
+async def login_page():
     """
     Serves the login/signup page.
     If user is already logged in, redirect to home page.
@@ -101,107 +678,83 @@ def login_page():
     # Check if user is already logged in
     if is_logged_in():
         # Redirect to home page since they're already logged in
-        return redirect(url_for("home_page"))
+        return redirect(page_url("pages.home_page"))
     
     # Serve the login.html template
-    return render_template("login.html")
+    # Not cached by the browser, because once the user logs in this URL
+    # should redirect to the home page instead
+    return await render_page("login.html", cache=False)
 
-@app.route("/home")
-def home_page():
+@pages_bp.route("/home")
+async def home_page():
     """
     Serves the home page with user stats and game history.
     Requires user to be logged in.
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Redirect to login page if not logged in
-        return redirect(url_for("login_page"))
-    
     # Serve the home.html template
-    return render_template("home.html")
+    return await render_page("home.html")
 
-@app.route("/play")
-def play_page():
+@pages_bp.route("/play")
+async def play_page():
     """
     Serves the game setup page where user enters a topic.
     Requires user to be logged in.
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Redirect to login page if not logged in
-        return redirect(url_for("login_page"))
-    
     # Serve the play.html template
-    return render_template("play.html")
+    return await render_page("play.html")
 
-@app.route("/quiz")
-def quiz_page():
+@pages_bp.route("/quiz")
+async def quiz_page():
     """
     Serves the quiz page where user answers questions.
     Requires user to be logged in.
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Redirect to login page if not logged in
-        return redirect(url_for("login_page"))
-    
     # Serve the quiz.html template
-    return render_template("quiz.html")
+    return await render_page("quiz.html")
 
-@app.route("/results")
-def results_page():
+@pages_bp.route("/results")
+async def results_page():
     """
     Serves the results page showing the user's score.
     Requires user to be logged in.
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Redirect to login page if not logged in
-        return redirect(url_for("login_page"))
-    
     # Serve the results.html template
-    return render_template("results.html")
+    return await render_page("results.html")
 
-@app.route("/leaderboard")
-def leaderboard_page():
+@pages_bp.route("/leaderboard")
+async def leaderboard_page():
     """
     Serves the leaderboard page showing all players ranked.
     Requires user to be logged in.
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Redirect to login page if not logged in
-        return redirect(url_for("login_page"))
-    
     # Serve the leaderboard.html template
-    return render_template("leaderboard.html")
+    return await render_page("leaderboard.html")
 
-@app.route("/account")
-def account_page():
+@pages_bp.route("/account")
+async def account_page():
     """
     Serves the account settings page.
     Requires user to be logged in.
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Redirect to login page if not logged in
-        return redirect(url_for("login_page"))
-    
     # Serve the account.html template
-    return render_template("account.html")
+    return await render_page("account.html")
 
 # ============================================================================
 # AUTHENTICATION API ROUTES
 # ============================================================================
 
-@app.route("/api/signup", methods=["POST"])
-def api_signup():
+# Blueprint that holds every JSON API route
+# url_prefix adds "/api" in front of each of its routes
+api_bp = Blueprint("api", __name__, url_prefix="/api")
+
+@api_bp.route("/signup", methods=["POST"])
+async def api_signup():
     """
     API endpoint to create a new user account.
     Expects JSON with 'username' and 'password' fields.
@@ -210,48 +763,14 @@ def api_signup():
         JSON response with success status and message
     """
     
-    # Get the JSON data sent from the frontend
-    data = request.get_json()
-    
-    # Check if data was received
-    if data is None:
-        # Return error if no data received
-        return jsonify({"success": False, "message": "No data received"}), 400
-    
-    # Extract username from the data
-    username = data.get("username", "")
-    
-    # Extract password from the data
-    password = data.get("password", "")
-    
-    # Validate that username is not empty
-    if not username or not username.strip():
-        # Return error if username is empty
-        return jsonify({"success": False, "message": "Username is required"}), 400
-    
-    # Validate that password is not empty
-    if not password or not password.strip():
-        # Return error if password is empty
-        return jsonify({"success": False, "message": "Password is required"}), 400
-    
-    # Clean up the username by removing extra whitespace
-    username = username.strip()
-    
-    # Clean up the password by removing extra whitespace
-    password = password.strip()
-    
-    # Check minimum length for username (at least 3 characters)
-    if len(username) < 3:
-        # Return error if username is too short
-        return jsonify({"success": False, "message": "Username must be at least 3 characters"}), 400
-    
-    # Check minimum length for password (at least 4 characters)
-    if len(password) < 4:
-        # Return error if password is too short
-        return jsonify({"success": False, "message": "Password must be at least 4 characters"}), 400
+    # Read and check the JSON sent from the frontend (see SignupRequest)
+    # The username and password come back already stripped of extra
+    # whitespace and long enough. Missing or wrong data raises an error that
+    # the API's error handlers turn into a 400 reply with the message
+    data = schemas.signup_decoder.decode(await request.get_data())
     
     # Call the database function to create the user
-    result = database.create_user(username, password)
+    result = await asyncio.to_thread(database.create_user, data.username, data.password)
     
     # Check if user creation was successful
     if result["success"]:
@@ -261,8 +780,8 @@ def api_signup():
         # Return error response with 400 status (Bad Request)
         return jsonify(result), 400
 
-@app.route("/api/login", methods=["POST"])
-def api_login():
+@api_bp.route("/login", methods=["POST"])
+async def api_login():
     """
     API endpoint to verify user credentials and start a session.
     Expects JSON with 'username' and 'password' fields.
@@ -271,36 +790,11 @@ def api_login():
         JSON response with success status and message
     """
     
-    # Get the JSON data sent from the frontend
-    data = request.get_json()
-    
-    # Check if data was received
-    if data is None:
-        # Return error if no data received
-        return jsonify({"success": False, "message": "No data received"}), 400
-    
-    # Extract username from the data
-    username = data.get("username", "")
-    
-    # Extract password from the data
-    password = data.get("password", "")
-    
-    # Validate that username is not empty
-    if not username or not username.strip():
-        # Return error if username is empty
-        return jsonify({"success": False, "message": "Username is required"}), 400
-    
-    # Validate that password is not empty
-    if not password or not password.strip():
-        # Return error if password is empty
-        return jsonify({"success": False, "message": "Password is required"}), 400
-    
-    # Clean up the username and password
-    username = username.strip()
-    password = password.strip()
+    # Read and check the JSON sent from the frontend (see LoginRequest)
+    data = schemas.login_decoder.decode(await request.get_data())
     
     # Call the database function to verify credentials
-    result = database.verify_user_login(username, password)
+    result = await asyncio.to_thread(database.verify_user_login, data.username, data.password)
     
     # Check if login was successful
     if result["success"]:
@@ -308,7 +802,7 @@ def api_login():
         session["user_id"] = result["user_id"]
         
         # Store the username in the session for display purposes
-        session["username"] = username
+        session["username"] = data.username
         
         # Return success response
         return jsonify({"success": True, "message": "Login successful"}), 200
@@ -316,8 +810,8 @@ def api_login():
         # Return error response with 401 status (Unauthorized)
         return jsonify(result), 401
 
-@app.route("/api/logout", methods=["POST"])
-def api_logout():
+@api_bp.route("/logout", methods=["POST"])
+async def api_logout():
     """
     API endpoint to end the user session and log out.
     Clears all session data.
@@ -342,8 +836,8 @@ def api_logout():
 # USER API ROUTES
 # ============================================================================
 
-@app.route("/api/user/stats", methods=["GET"])
-def api_get_user_stats():
+@api_bp.route("/user/stats", methods=["GET"])
+async def api_get_user_stats():
     """
     API endpoint to get the current user's statistics.
     Returns username, games played, games won, and win rate.
@@ -352,16 +846,11 @@ def api_get_user_stats():
         JSON response with user stats or error message
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Return error if not logged in
-        return jsonify({"success": False, "message": "Not logged in"}), 401
-    
-    # Get the current user's ID from the session
+    # Get the current user's ID (saved by require_login)
     user_id = get_current_user_id()
     
     # Call the database function to get user stats
-    result = database.get_user_stats(user_id)
+    result = await database.get_user_stats_async(user_id)
     
     # Check if retrieval was successful
     if result["success"]:
@@ -371,26 +860,22 @@ def api_get_user_stats():
         # Return error with 404 status (Not Found)
         return jsonify(result), 404
 
-@app.route("/api/user/info", methods=["GET"])
-def api_get_user_info():
+@api_bp.route("/user/info", methods=["GET"])
+async def api_get_user_info():
     """
     API endpoint to get the current user's account information.
-    Used for the account settings page.
+    Used for the account settings page. Includes the game stats as well,
+    so the page only needs this one request.
     
     Returns:
         JSON response with user info or error message
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Return error if not logged in
-        return jsonify({"success": False, "message": "Not logged in"}), 401
-    
-    # Get the current user's ID from the session
+    # Get the current user's ID (saved by require_login)
     user_id = get_current_user_id()
     
     # Call the database function to get user info
-    result = database.get_user_info(user_id)
+    result = await database.get_user_info_async(user_id)
     
     # Check if retrieval was successful
     if result["success"]:
@@ -400,8 +885,8 @@ def api_get_user_info():
         # Return error with 404 status (Not Found)
         return jsonify(result), 404
 
-@app.route("/api/user/username", methods=["PUT"])
-def api_update_username():
+@api_bp.route("/user/username", methods=["PUT"])
+async def api_update_username():
     """
     API endpoint to update the current user's username.
     Expects JSON with 'new_username' field.
@@ -410,40 +895,17 @@ def api_update_username():
         JSON response with success status and message
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Return error if not logged in
-        return jsonify({"success": False, "message": "Not logged in"}), 401
+    # Read and check the JSON sent from the frontend (see UpdateUsernameRequest)
+    data = schemas.update_username_decoder.decode(await request.get_data())
     
-    # Get the JSON data sent from the frontend
-    data = request.get_json()
+    # The new username, already stripped and at least 3 characters long
+    new_username = data.new_username
     
-    # Check if data was received
-    if data is None:
-        # Return error if no data received
-        return jsonify({"success": False, "message": "No data received"}), 400
-    
-    # Extract the new username from the data
-    new_username = data.get("new_username", "")
-    
-    # Validate that new username is not empty
-    if not new_username or not new_username.strip():
-        # Return error if new username is empty
-        return jsonify({"success": False, "message": "New username is required"}), 400
-    
-    # Clean up the new username
-    new_username = new_username.strip()
-    
-    # Check minimum length for username (at least 3 characters)
-    if len(new_username) < 3:
-        # Return error if username is too short
-        return jsonify({"success": False, "message": "Username must be at least 3 characters"}), 400
-    
-    # Get the current user's ID from the session
+    # Get the current user's ID (saved by require_login)
     user_id = get_current_user_id()
     
     # Call the database function to update username
-    result = database.update_username(user_id, new_username)
+    result = await asyncio.to_thread(database.update_username, user_id, new_username)
     
     # Check if update was successful
     if result["success"]:
@@ -456,8 +918,8 @@ def api_update_username():
         # Return error response
         return jsonify(result), 400
 
-@app.route("/api/user/password", methods=["PUT"])
-def api_update_password():
+@api_bp.route("/user/password", methods=["PUT"])
+async def api_update_password():
     """
     API endpoint to update the current user's password.
     Expects JSON with 'current_password' and 'new_password' fields.
@@ -466,49 +928,14 @@ def api_update_password():
         JSON response with success status and message
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Return error if not logged in
-        return jsonify({"success": False, "message": "Not logged in"}), 401
-    
-    # Get the JSON data sent from the frontend
-    data = request.get_json()
-    
-    # Check if data was received
-    if data is None:
-        # Return error if no data received
-        return jsonify({"success": False, "message": "No data received"}), 400
-    
-    # Extract the current password from the data
-    current_password = data.get("current_password", "")
+    # Read and check the JSON sent from the frontend (see UpdatePasswordRequest)
+    data = schemas.update_password_decoder.decode(await request.get_data())
     
-    # Extract the new password from the data
-    new_password = data.get("new_password", "")
-    
-    # Validate that current password is not empty
-    if not current_password or not current_password.strip():
-        # Return error if current password is empty
-        return jsonify({"success": False, "message": "Current password is required"}), 400
-    
-    # Validate that new password is not empty
-    if not new_password or not new_password.strip():
-        # Return error if new password is empty
-        return jsonify({"success": False, "message": "New password is required"}), 400
-    
-    # Clean up the passwords
-    current_password = current_password.strip()
-    new_password = new_password.strip()
-    
-    # Check minimum length for new password (at least 4 characters)
-    if len(new_password) < 4:
-        # Return error if new password is too short
-        return jsonify({"success": False, "message": "New password must be at least 4 characters"}), 400
-    
-    # Get the current user's ID from the session
+    # Get the current user's ID (saved by require_login)
     user_id = get_current_user_id()
     
     # Call the database function to update password
-    result = database.update_password(user_id, current_password, new_password)
+    result = await asyncio.to_thread(database.update_password, user_id, data.current_password, data.new_password)
     
     # Check if update was successful
     if result["success"]:
@@ -518,8 +945,8 @@ def api_update_password():
         # Return error response
         return jsonify(result), 400
 
-@app.route("/api/user/delete", methods=["DELETE"])
-def api_delete_user():
+@api_bp.route("/user/delete", methods=["DELETE"])
+async def api_delete_user():
     """
     API endpoint to delete the current user's account.
     This permanently removes the user and all their game history.
@@ -528,16 +955,11 @@ def api_delete_user():
         JSON response with success status and message
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Return error if not logged in
-        return jsonify({"success": False, "message": "Not logged in"}), 401
-    
-    # Get the current user's ID from the session
+    # Get the current user's ID (saved by require_login)
     user_id = get_current_user_id()
     
     # Call the database function to delete the user account
-    result = database.delete_user_account(user_id)
+    result = await asyncio.to_thread(database.delete_user_account, user_id)
     
     # Check if deletion was successful
     if result["success"]:
@@ -554,8 +976,8 @@ def api_delete_user():
 # GAME API ROUTES
 # ============================================================================
 
-@app.route("/api/game/generate", methods=["POST"])
-def api_generate_game():
+@api_bp.route("/game/generate", methods=["POST"])
+async def api_generate_game():
     """
     API endpoint to generate a new quiz with 10 MCQ questions.
     Expects JSON with 'topic' field.
@@ -564,40 +986,21 @@ def api_generate_game():
         JSON response with questions or error message
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Return error if not logged in
-        return jsonify({"success": False, "message": "Not logged in"}), 401
+    # Read and check the JSON sent from the frontend (see GenerateGameRequest)
+    data = schemas.generate_game_decoder.decode(await request.get_data())
     
-    # Get the JSON data sent from the frontend
-    data = request.get_json()
+    # The topic, already stripped of extra whitespace and not empty
+    topic = data.topic
     
-    # Check if data was received
-    if data is None:
-        # Return error if no data received
-        return jsonify({"success": False, "message": "No data received"}), 400
-    
-    # Extract the topic from the data
-    topic = data.get("topic", "")
-    
-    # Validate that topic is not empty
-    if not topic or not topic.strip():
-        # Return error if topic is empty
-        return jsonify({"success": False, "message": "Topic is required"}), 400
-    
-    # Clean up the topic
-    topic = topic.strip()
-    
-    # Call the MCQ generator function to create questions
-    result = generate_quiz(topic)
+    # Get a quiz for this topic (from the cache, or freshly generated)
+    # The LLM call is awaited, so the event loop keeps serving other requests
+    # while Gemini is writing the questions
+    result = await get_quiz(topic)
     
     # Check if generation was successful
     if result["success"]:
-        # Store the topic in the session for later use (results page)
-        session["current_topic"] = topic
-        
-        # Store the questions in the session for answer verification
-        session["current_questions"] = result["questions"]
+        # Store the topic and what is needed to grade the answers later
+        await save_active_quiz(quiz_for_grading(topic, result["questions"]))
         
         # Return the questions with 200 status (OK)
         return jsonify(result), 200
@@ -605,8 +1008,109 @@ def api_generate_game():
         # Return error response
         return jsonify(result), 500
 
-@app.route("/api/game/submit", methods=["POST"])
-def api_submit_game():
+@api_bp.route("/game/generate/stream", methods=["POST"])
+async def api_generate_game_stream():
+    """
+    API endpoint that gets a quiz (from the cache, or freshly generated) and
+    sends each question as soon as it is ready, as Server-Sent Events
+    (text/event-stream).
+    Expects JSON with 'topic' field, like /api/game/generate.
+    
+    Events:
+        question: One question object, in quiz order (question_number 1
+                  again means the quiz started over after a failed stream)
+        done: {"success": true, "topic": ..., "quiz_token": ...} at the end
+        error: {"success": false, "message": ...} if generation failed
+    
+    Returns:
+        Response: The stream of events
+    """
+    
+    # Read and check the JSON sent from the frontend (see GenerateGameRequest)
+    # This happens before the stream starts, so bad input still gets a 400
+    data = schemas.generate_game_decoder.decode(await request.get_data())
+    
+    # The topic, already stripped of extra whitespace and not empty
+    topic = data.topic
+    
+    # The one-time code that goes into this quiz's token
+    # It has to be made here: once the stream starts the session is sent
+    nonce = await issue_quiz_nonce()
+    
+    async def events():
+        # The questions sent so far, needed to build the quiz token
+        questions = []
+        
+        try:
+            # Send every question the moment it is ready
+            # (cached quizzes are sent all at once)
+            async for question in get_quiz_stream(topic):
+                # Question 1 again means the quiz started over with the
+                # normal generator, so forget the questions sent before it
+                del questions[question["question_number"] - 1:]
+                questions.append(question)
+                yield sse_event("question", question)
+        except Exception as e:
+            # Tell the page the quiz could not be finished
+            app.logger.error("Error streaming quiz: %s", e)
+            yield sse_event("error", {
+                "success": False,
+                "message": "Failed to generate quiz. Please try again."
+            })
+            return
+        
+        # The session cannot be changed any more (it was sent with the first
+        # event), so the page gets the signed quiz and hands it to /api/game/start
+        yield sse_event("done", {
+            "success": True,
+            "topic": topic,
+            "quiz_token": quiz_signer.dumps({
+                "nonce": nonce,
+                "quiz": quiz_for_grading(topic, questions)
+            })
+        })
+    
+    # Stream the events; no-cache stops the browser from storing them and
+    # X-Accel-Buffering stops nginx from holding them back until the end
+    return Response(events(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+@api_bp.route("/game/start", methods=["POST"])
+async def api_start_game():
+    """
+    API endpoint that makes a streamed quiz the active quiz, so it can be
+    submitted like a quiz from /api/game/generate.
+    Expects JSON with the 'quiz_token' from the stream's done event.
+    
+    Returns:
+        JSON response with success status
+    """
+    
+    # Read and check the JSON sent from the frontend (see StartGameRequest)
+    data = schemas.start_game_decoder.decode(await request.get_data())
+    
+    # Check the signature and age of the token and read the quiz back
+    # A token that was changed or is older than a stored quiz may live is rejected
+    try:
+        token = quiz_signer.loads(data.quiz_token, max_age=QUIZ_STORE_SECONDS)
+    except BadSignature:
+        return error_response("Invalid or expired quiz, please generate a new one", 400)
+    
+    # Each token can start its quiz only once, so a known quiz cannot be
+    # replayed and submitted again and again
+    if not await use_quiz_nonce(token["nonce"]):
+        return error_response("This quiz was already started, please generate a new one", 400)
+    
+    # Store the quiz the same way /api/game/generate does
+    await save_active_quiz(token["quiz"])
+    
+    # Return success response
+    return jsonify({"success": True}), 200
+
+@api_bp.route("/game/submit", methods=["POST"])
+async def api_submit_game():
     """
     API endpoint to submit game results after completing a quiz.
     Expects JSON with 'answers' (list of user's answers) and 'topic' fields.
@@ -615,94 +1119,79 @@ def api_submit_game():
         JSON response with score, result, and detailed feedback
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Return error if not logged in
-        return jsonify({"success": False, "message": "Not logged in"}), 401
-    
-    # Get the JSON data sent from the frontend
-    data = request.get_json()
-    
-    # Check if data was received
-    if data is None:
-        # Return error if no data received
-        return jsonify({"success": False, "message": "No data received"}), 400
+    # Read and check the JSON sent from the frontend (see SubmitGameRequest)
+    # answers is always a list of single lowercase letters once it gets here
+    # ("" for a question that was left unanswered)
+    data = schemas.submit_game_decoder.decode(await request.get_data())
     
     # Extract the user's answers from the data
-    user_answers = data.get("answers", [])
+    user_letters = data.answers
     
     # Extract the topic from the data
-    topic = data.get("topic", "")
+    topic = data.topic
+    
+    # Get the quiz stored when it was generated (from Redis or the session)
+    quiz = await load_active_quiz()
     
-    # Get the questions from the session (stored when quiz was generated)
-    questions = session.get("current_questions", [])
+    # Check if there is an active quiz
+    if not quiz:
+        # Return error if no quiz found
+        return error_response("No active quiz found", 400)
     
-    # Check if questions exist in the session
-    if not questions:
-        # Return error if no questions found
-        return jsonify({"success": False, "message": "No active quiz found"}), 400
+    # The correct answers, one lowercase letter per question
+    correct_answers = quiz["correct"]
     
     # Check if the number of answers matches the number of questions
-    if len(user_answers) != len(questions):
+    # (zip below would silently skip questions if the counts were different)
+    if len(user_letters) != len(correct_answers):
         # Return error if answer count doesn't match
         return jsonify({
             "success": False, 
-            "message": f"Expected {len(questions)} answers but received {len(user_answers)}"
+            "message": f"Expected {len(correct_answers)} answers but received {len(user_letters)}"
         }), 400
     
-    # Initialize score counter
-    score = 0
+    # Compare the answers with the correct letters element by element
+    # hits[i] is True when question i was answered correctly
+    hits = [user_letter == correct_letter for user_letter, correct_letter in zip(user_letters, correct_answers)]
     
-    # Create a list to store detailed results for each question
-    detailed_results = []
+    # The score is the number of hits (True counts as 1)
+    score = sum(hits)
     
-    # Loop through each question and check the answer
-    for i, question in enumerate(questions):
-        # Get the user's answer for this question (convert to lowercase)
-        user_answer = user_answers[i].lower() if i < len(user_answers) else ""
-        
-        # Get the correct answer (convert to lowercase for comparison)
-        correct_answer = question["correct"].lower()
-        
-        # Check if the answer is correct
-        is_correct = (user_answer == correct_answer)
-        
-        # If correct, increment the score
-        if is_correct:
-            score += 1
-        
-        # Add detailed result for this question
-        detailed_results.append({
+    # Build the feedback for every question in a single pass over the arrays
+    detailed_results = [
+        {
             "question_number": i + 1,                    # Question number (1-10)
-            "user_answer": user_answer,                  # What the user selected
-            "correct_answer": correct_answer,            # The correct answer
-            "is_correct": is_correct,                    # Whether user was correct
-            "question": question["question"],            # The question text
-            "difficulty": question["difficulty"]         # The difficulty level
-        })
+            "user_answer": user_letter,                  # What the user selected
+            "correct_answer": correct_letter,            # The correct answer
+            "is_correct": is_hit,                        # Whether user was correct
+            "question": question_text,                   # The question text
+            "difficulty": difficulty                     # The difficulty level
+        }
+        for i, (user_letter, correct_letter, is_hit, question_text, difficulty)
+        in enumerate(zip(user_letters, correct_answers, hits, quiz["qtext"], quiz["diff"]))
+    ]
     
     # Determine if the user won (score >= 7)
     result = "WON" if score >= 7 else "LOST"
     
-    # Get the current user's ID from the session
+    # Get the current user's ID (saved by require_login)
     user_id = get_current_user_id()
     
-    # Use the topic from session if not provided in the request
+    # Use the topic from the stored quiz if not provided in the request
     if not topic:
-        topic = session.get("current_topic", "Unknown Topic")
+        topic = quiz.get("topic", "Unknown Topic")
     
     # Save the game to history and update user stats
-    save_result = database.create_game_history(user_id, topic, score, result)
+    save_result = await asyncio.to_thread(database.create_game_history, user_id, topic, score, result)
     
-    # Clear the current quiz from the session
-    session.pop("current_questions", None)
-    session.pop("current_topic", None)
+    # Clear the current quiz so it cannot be submitted twice
+    await clear_active_quiz()
     
     # Return the results
     return jsonify({
         "success": True,
         "score": score,                      # Number of correct answers
-        "total": 10,                         # Total questions
+        "total": len(correct_answers),       # Total questions
         "result": result,                    # "WON" or "LOST"
         "topic": topic,                      # The quiz topic
         "detailed_results": detailed_results, # Per-question breakdown
@@ -713,32 +1202,39 @@ def api_submit_game():
 # HISTORY API ROUTES
 # ============================================================================
 
-@app.route("/api/history", methods=["GET"])
-def api_get_history():
+@api_bp.route("/history", methods=["GET"])
+async def api_get_history():
     """
     API endpoint to get the current user's game history.
-    Returns a list of all past games.
+    Returns one page of past games, newest first
+    (?limit= and ?offset= choose the page, see get_page_args).
     
     Returns:
         JSON response with history list or error message
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Return error if not logged in
-        return jsonify({"success": False, "message": "Not logged in"}), 401
-    
-    # Get the current user's ID from the session
+    # Get the current user's ID (saved by require_login)
     user_id = get_current_user_id()
     
+    # Read which page of history was asked for
+    limit, offset = get_page_args(database.HISTORY_LIMIT)
+    
     # Call the database function to get game history
-    result = database.get_game_history(user_id)
+    result = await database.get_game_history_async(user_id, limit, offset)
     
-    # Return the history (always returns 200, even if empty)
-    return jsonify(result), 200
+    # Build the history response (always returns 200, even if empty)
+    response = jsonify(result)
+    
+    # History only changes when the user finishes or deletes a game, so most
+    # refreshes can be answered with an empty 304 instead of the whole list
+    # "no-cache" tells the browser to always check its copy with us first
+    response.headers["Cache-Control"] = "private, no-cache"
+    
+    # Return the history, or a 304 if the browser already has it
+    return await with_etag(response)
 
-@app.route("/api/history/<int:history_id>", methods=["DELETE"])
-def api_delete_history(history_id):
+@api_bp.route("/history/<int:history_id>", methods=["DELETE"])
+async def api_delete_history(history_id):
     """
     API endpoint to delete a specific game history entry.
     The history_id is passed as part of the URL.
@@ -750,17 +1246,12 @@ def api_delete_history(history_id):
         JSON response with success status and message
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Return error if not logged in
-        return jsonify({"success": False, "message": "Not logged in"}), 401
-    
-    # Get the current user's ID from the session
+    # Get the current user's ID (saved by require_login)
     user_id = get_current_user_id()
     
     # Call the database function to delete the history entry
     # Pass both history_id and user_id for security
-    result = database.delete_game_history_entry(history_id, user_id)
+    result = await asyncio.to_thread(database.delete_game_history_entry, history_id, user_id)
     
     # Check if deletion was successful
     if result["success"]:
@@ -774,26 +1265,25 @@ def api_delete_history(history_id):
 # LEADERBOARD API ROUTES
 # ============================================================================
 
-@app.route("/api/leaderboard", methods=["GET"])
-def api_get_leaderboard():
+@api_bp.route("/leaderboard", methods=["GET"])
+async def api_get_leaderboard():
     """
     API endpoint to get the leaderboard data.
-    Returns all users ranked by win rate.
+    Returns one page of users ranked by win rate
+    (?limit= and ?offset= choose the page, see get_page_args).
     
     Returns:
         JSON response with leaderboard data or error message
     """
     
-    # Check if user is logged in
-    if not is_logged_in():
-        # Return error if not logged in
-        return jsonify({"success": False, "message": "Not logged in"}), 401
-    
     # Get the current user's ID to highlight their row
     current_user_id = get_current_user_id()
     
+    # Read which page of the leaderboard was asked for
+    limit, offset = get_page_args(database.LEADERBOARD_LIMIT)
+    
     # Call the database function to get leaderboard data
-    result = database.get_leaderboard()
+    result = await database.get_leaderboard_async(limit, offset)
     
     # Add current_user_id to the response so frontend can highlight the user
     result["current_user_id"] = current_user_id
@@ -805,39 +1295,104 @@ def api_get_leaderboard():
 # ERROR HANDLERS
 # ============================================================================
 
+@api_bp.route("/<path:unknown_path>", methods=["GET", "POST", "PUT", "DELETE"])
+async def api_not_found(unknown_path):
+    """
+    Catches every /api/ URL that does not match one of the routes above.
+    The real routes are always tried first, so this only runs for unknown
+    URLs. It hands them to the API's 404 handler below.
+    
+    Args:
+        unknown_path: The rest of the URL after /api/
+    """
+    
+    # Stop with a 404 error, answered by api_not_found_error
+    abort(404)
+
+@api_bp.errorhandler(msgspec.ValidationError)
+async def invalid_request_data(error):
+    """
+    Handles request JSON that is missing a field or has a wrong value.
+    The schemas in schemas.py raise this with a message for the user,
+    like "Username is required".
+    """
+    
+    # Return the message from the schema as a JSON error
+    return jsonify({"success": False, "message": str(error)}), 400
+
+@api_bp.errorhandler(msgspec.DecodeError)
+async def bad_request_data(error):
+    """
+    Handles a request body that is empty or is not valid JSON.
+    """
+    
+    # Return error if no (readable) data was received
+    return error_response("No data received", 400)
+
+@api_bp.errorhandler(404)
+async def api_not_found_error(error):
+    """
+    Handles 404 errors (endpoint not found) for the API routes.
+    Returns a JSON error message the frontend can read.
+    """
+    
+    # Return JSON error for API requests
+    return error_response("Endpoint not found", 404)
+
 @app.errorhandler(404)
-def not_found_error(error):
+async def not_found_error(error):
     """
-    Handles 404 errors (page not found).
-    Returns a JSON error message for API routes, or redirects for pages.
+    Handles 404 errors (page not found) for everything outside /api/.
+    Redirects to the index page, which sends the user to login or home.
     """
     
-    # Check if the request was for an API endpoint
-    if request.path.startswith("/api/"):
-        # Return JSON error for API requests
-        return jsonify({"success": False, "message": "Endpoint not found"}), 404
-    else:
-        # Redirect to home page for regular page requests
-        return redirect(url_for("index"))
+    # Redirect to home page for regular page requests
+    return redirect(page_url("pages.index"))
 
 @app.errorhandler(500)
-def internal_error(error):
+async def internal_error(error):
     """
     Handles 500 errors (internal server error).
     Returns a JSON error message.
     """
     
     # Return JSON error message
-    return jsonify({"success": False, "message": "Internal server error"}), 500
+    return error_response("Internal server error", 500)
+
+# ============================================================================
+# SHUTDOWN
+# ============================================================================
+
+@app.after_serving
+async def close_database():
+    """
+    Runs once when the server stops.
+    Closes the async database connections so MySQL is not left waiting
+    for them to time out.
+    """
+    
+    # Close the aiomysql pool used by the async read functions
+    await database.close_async_pool()
+
+# ============================================================================
+# REGISTER BLUEPRINTS
+# ============================================================================
+
+# Add the page routes and the API routes to the app
+# This has to come after all of their routes and error handlers are defined
+app.register_blueprint(pages_bp)
+app.register_blueprint(api_bp)
 
 # ============================================================================
 # RUN THE APPLICATION
 # ============================================================================
 
 # This block only runs if this file is executed directly (not imported)
+# For production, run "python asgi.py" instead, which starts the app with
+# Uvicorn and several worker processes (see asgi.py)
 if __name__ == "__main__":
-    # Run the Flask development server
+    # Run the Quart development server
     # debug=True enables auto-reload and detailed error messages
     # host="0.0.0.0" allows access from other devices on the network
-    # port=5000 is the default Flask port
+    # port=5000 is the default Flask/Quart port
     app.run(debug=True, host="0.0.0.0", port=5000)
\ No newline at end of file
@@ -0,0 +1,93 @@
+# ============================================================================
+# asgi.py
+# Production entry point for the MCQ Quiz Game
+# "python app.py" starts Quart's development server, which runs a single
+# process with the debugger turned on. This file runs the same app with
+# Uvicorn instead, using several worker processes.
+# ============================================================================
+
+# Import os module to read settings from environment variables
+import os
+
+# Import logging, plus the queue-based helpers and a thread-safe queue, so
+# writing a log message never makes a request wait for the terminal
+import logging
+import logging.handlers
+import queue
+
+# Import atexit to flush the last log messages when the app shuts down
+import atexit
+
+# Import uvicorn, the ASGI server that runs the Quart app in production
+import uvicorn
+
+# Import the Quart app so ASGI servers can find it as "asgi:app"
+# (for example: gunicorn asgi:app -k uvicorn.workers.UvicornWorker -w 4)
+from app import app
+
+# ============================================================================
+# LOGGING
+# ============================================================================
+
+# Which messages are written: WARNING and above by default, so the quiz
+# generator's INFO progress lines cost nothing in production
+# Set LOG_LEVEL=INFO (or DEBUG) to see more
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING").upper()
+
+# Queue that holds log records until they are written
+# SimpleQueue is safe to use from many worker threads at once
+_log_queue = queue.SimpleQueue()
+
+# The app's loggers (like "database" and "mcq_generator") pass their records
+# up to the root logger, which only puts them on the queue (very fast)
+# Writing to the terminal instead waits for it while holding a lock, which
+# slows every request down when many errors happen at once
+logging.getLogger().setLevel(LOG_LEVEL)
+logging.getLogger().addHandler(logging.handlers.QueueHandler(_log_queue))
+
+# A background thread takes records off the queue and writes them to the
+# terminal (stderr) with a StreamHandler
+_log_output = logging.StreamHandler()
+_log_output.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_output)
+_log_listener.start()
+
+# Stop the background thread (and write what is left) when Python exits
+atexit.register(_log_listener.stop)
+
+# ============================================================================
+# SERVER SETTINGS
+# ============================================================================
+
+# The address to listen on ("0.0.0.0" allows access from other devices)
+HOST = os.getenv("HOST", "0.0.0.0")
+
+# The port to listen on (5000, the same as the development server)
+PORT = int(os.getenv("PORT", "5000"))
+
+# How many worker processes to start
+# Each worker is a separate Python process with its own event loop, so
+# several workers can use several CPU cores at the same time
+# WEB_CONCURRENCY is the usual name for this setting on hosting platforms
+# Each worker may open up to database.POOL_SIZE MySQL connections, so keep
+# WORKERS x POOL_SIZE below MySQL's max_connections (151 by default)
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "4"))
+
+# ============================================================================
+# RUN THE SERVER
+# ============================================================================
+
+# This block only runs if this file is executed directly (not imported)
+if __name__ == "__main__":
+    # Start Uvicorn with the settings above
+    # The app is passed as the string "asgi:app" because every worker
+    # process has to import it again by itself
+    # loop="auto" uses the faster uvloop event loop when it is installed
+    # (Linux and macOS) and the normal asyncio loop otherwise (Windows)
+    uvicorn.run(
+        "asgi:app",
+        host=HOST,
+        port=PORT,
+        workers=WORKERS,
+        loop="auto"
+    )
@@ -4,50 +4,691 @@
 # It contains functions for all CRUD (Create, Read, Update, Delete) operations
 # ============================================================================
 
-# Import the MySQL connector library to communicate with MySQL database
-import mysql.connector
+# Import os to find out how many CPU cores this computer has
+import os
+
+# Import threading so the connection pool is only created once, even when
+# several requests arrive at the same time from different worker threads
+import threading
+
+# Import hmac to compare old plain text passwords in constant time
+# and to fingerprint passwords for the login cache
+import hmac
+
+# Import hashlib for the SHA-256 hash used by the login cache fingerprints
+import hashlib
+
+# Import secrets to make the random key for the login cache fingerprints
+import secrets
+
+# Import time to know when login cache entries expire
+import time
+
+# Import logging to report database errors
+import logging
+
+# Import re to adjust the SQL text for aiomysql (see for_aiomysql)
+import re
+
+# Import asyncio for the lock that guards the async connection pool
+import asyncio
+
+# Import contextmanager to build the "with get_conn() as connection:" helper
+# and asynccontextmanager for its async version, get_async_conn
+from contextlib import contextmanager, asynccontextmanager
+
+# Import PasswordHasher from argon2-cffi to hash passwords with Argon2
+# The hashing itself runs in the C libargon2 library, not in Python
+from argon2 import PasswordHasher
+
+# Import the errors argon2 raises when a password does not match a hash
+from argon2.exceptions import VerificationError
+from argon2.exceptions import InvalidHashError
+
+# Import the pooling module from the MySQL connector library
+# A pool keeps connections open so they can be reused between requests
+from mysql.connector import pooling
 
 # Import mysql.connector.Error to handle database-specific errors
 from mysql.connector import Error
 
+# Import IntegrityError, raised when a query breaks a rule of the table
+# (for example a UNIQUE column getting a value that is already used)
+from mysql.connector import IntegrityError
+
+# Import errorcode, which has names for MySQL's error numbers
+from mysql.connector import errorcode
+
+# Import aiomysql, an async MySQL driver, for the read queries that the
+# Quart routes await directly (see ASYNC READ OPERATIONS below)
+import aiomysql
+
+# Import HAVE_CEXT, which is True when the connector's C extension is installed
+# The C extension reads MySQL's replies and builds the rows in C, which is
+# much faster than the pure Python version of the same code
+from mysql.connector import HAVE_CEXT
+
+# ============================================================================
+# LOGGING
+# ============================================================================
+
+# Logger for this file (named "database")
+# Its records go up to the root logger, so the app's logging setup (see
+# asgi.py) decides where they are written and which levels are shown
+# Each line looks like: "ERROR database: Error getting leaderboard: ..."
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# DATABASE CONNECTION POOL
+# ============================================================================
+
+# Settings used to connect to the MySQL database
+# host: The server where MySQL is running (localhost means this computer)
+# user: The MySQL username (root is the default XAMPP user)
+# password: The MySQL password (empty string is default for XAMPP)
+# database: The name of our database we created in database.sql
+DB_CONFIG = {
+    "host": "localhost",        # MySQL server location
+    "user": "root",             # Default XAMPP MySQL username
+    "password": "",             # Default XAMPP MySQL password (empty)
+    "database": "mcq_game_db"   # Our database name
+}
+
+# How many MySQL connections one worker process may have open in total
+# The app runs queries through asyncio.to_thread, whose thread pool has
+# min(32, CPU cores + 4) threads, so more connections than that would sit unused
+# This also matters with several worker processes (see asgi.py): each one
+# has its own pools, and MySQL only allows 151 connections by default, so
+# the whole app uses at most WEB_CONCURRENCY x POOL_SIZE connections
+# (4 workers x 32 = 128 at most with the default settings)
+POOL_SIZE = min(32, (os.cpu_count() or 1) + 4)
+
+# The budget is shared by the two pools, so adding the async pool did not
+# double the number of connections
+# The async pool (aiomysql) serves the page reads the routes await directly
+ASYNC_POOL_SIZE = max(1, POOL_SIZE // 2)
+
+# The normal pool (mysql-connector) serves the writes and the login checks
+# that run through asyncio.to_thread, and gets the rest of the budget
+SYNC_POOL_SIZE = max(1, POOL_SIZE - ASYNC_POOL_SIZE)
+
+# How many players the leaderboard shows on one page
+LEADERBOARD_LIMIT = 100
+
+# How many past games the history list shows on one page
+# Without a limit every game a player ever finished would be sent each time
+HISTORY_LIMIT = 50
+
+# How long (in seconds) the leaderboard is reused before it is read again
+# Every visitor sees the same leaderboard, so one query every 30 seconds is
+# enough no matter how many people open the page
+LEADERBOARD_CACHE_TTL = 30
+
+# The pool itself is created the first time a connection is needed
+# This way the app can still start even if MySQL is not running yet
+_connection_pool = None
+
+# Lock that stops two threads from creating the pool at the same time
+_pool_lock = threading.Lock()
+
+# Counts the free connections of the pool, so a thread waits for one
+# The asyncio.to_thread threads (POOL_SIZE of them) outnumber the pool's
+# SYNC_POOL_SIZE connections, and the pool itself does not wait: asking an
+# empty pool raises "pool exhausted" right away, which would turn a short
+# burst of logins or submits into "Database connection failed" errors
+_pool_slots = threading.BoundedSemaphore(SYNC_POOL_SIZE)
+
+def get_connection_pool():
+    """
+    Returns the shared MySQL connection pool, creating it on first use.
+    Opening a new MySQL connection means a TCP handshake plus a login,
+    so keeping a pool of open connections makes every query faster.
+    
+    Returns:
+        MySQLConnectionPool: The pool that all database functions borrow from
+    """
+    
+    # Use the global variable so every caller shares the same pool
+    global _connection_pool
+    
+    # Only take the lock if the pool has not been created yet
+    if _connection_pool is None:
+        with _pool_lock:
+            # Check again inside the lock in case another thread just made it
+            if _connection_pool is None:
+                # The mysql-connector-python wheels include the C extension, so
+                # this only happens on platforms without a prebuilt wheel
+                if not HAVE_CEXT:
+                    logger.warning("mysql-connector C extension not found, using the slower pure Python driver")
+                
+                # pool_reset_session=False skips an extra round trip to the
+                # server every time a connection is handed back to the pool
+                # (we never change session settings, so there is nothing to reset)
+                # autocommit=True makes every query its own finished transaction,
+                # so a read never leaves a transaction open that has to be
+                # rolled back before the connection can be reused
+                # Writes still get a real transaction from transaction() below
+                # use_pure=False asks for the C extension; it is only set to
+                # True when the C extension is missing, because asking for it
+                # then would stop the pool from being created at all
+                _connection_pool = pooling.MySQLConnectionPool(
+                    pool_name="mcq_pool",          # Name of the pool
+                    pool_size=SYNC_POOL_SIZE,      # Number of open connections
+                    pool_reset_session=False,      # Skip the reset round trip
+                    autocommit=True,               # Reads need no COMMIT/ROLLBACK
+                    use_pure=not HAVE_CEXT,        # Use the fast C extension
+                    **DB_CONFIG                    # Host, user, password, database
+                )
+    
+    # Return the shared pool
+    return _connection_pool
+
 # ============================================================================
-# DATABASE CONNECTION FUNCTION
+# DATABASE CONNECTION FUNCTIONS
 # ============================================================================
 
 def get_db_connection():
     """
-    Creates and returns a connection to the MySQL database.
-    This function is called every time we need to interact with the database.
+    Borrows a connection to the MySQL database from the connection pool.
+    Calling close() on the connection hands it back to the pool instead of
+    actually disconnecting from the server.
     
     Returns:
-        connection: A MySQL database connection object if successful
+        connection: A pooled MySQL database connection object if successful
         None: If the connection fails
     """
     
     try:
-        # Create a connection to the MySQL database using the connector
-        # host: The server where MySQL is running (localhost means this computer)
-        # user: The MySQL username (root is the default XAMPP user)
-        # password: The MySQL password (empty string is default for XAMPP)
-        # database: The name of our database we created in database.sql
-        connection = mysql.connector.connect(
-            host="localhost",        # MySQL server location
-            user="root",             # Default XAMPP MySQL username
-            password="",             # Default XAMPP MySQL password (empty)
-            database="mcq_game_db"   # Our database name
-        )
+        # Take a free connection from the pool
+        # The pool reconnects automatically if MySQL dropped the connection
+        connection = get_connection_pool().get_connection()
         
-        # Check if the connection was successful
-        if connection.is_connected():
-            # Return the connection object so other functions can use it
-            return connection
+        # Return the connection object so other functions can use it
+        return connection
             
     except Error as e:
-        # If connection fails, print the error message for debugging
-        print(f"Error connecting to MySQL database: {e}")
+        # If connection fails, log the error message for debugging
+        logger.error("Error connecting to MySQL database: %s", e)
         # Return None to indicate the connection failed
         return None
 
+@contextmanager
+def get_conn():
+    """
+    Context manager that borrows a pooled connection and always returns it.
+    Use it as "with get_conn() as connection:" - when the block ends the
+    connection goes back to the pool, even if an error was raised.
+    When every connection is in use, it waits until one is given back.
+    
+    Yields:
+        connection: A pooled MySQL database connection object if successful
+        None: If the connection fails
+    """
+    
+    # Wait until one of the pool's connections is free
+    _pool_slots.acquire()
+    
+    try:
+        # Borrow a connection from the pool (None if the database is unreachable)
+        connection = get_db_connection()
+        
+        try:
+            # Hand the connection to the code inside the with-block
+            yield connection
+            
+        finally:
+            # Nothing to give back if we never got a connection
+            if connection is not None:
+                try:
+                    # With autocommit on, a transaction is only still open here
+                    # if a write failed halfway (for example the COMMIT itself)
+                    # Roll it back so the next user of this connection starts clean
+                    if connection.in_transaction:
+                        connection.rollback()
+                except Error as e:
+                    # A broken connection cannot be rolled back; the pool will
+                    # reconnect it the next time it is borrowed
+                    logger.error("Error resetting pooled connection: %s", e)
+                
+                # Return the connection to the pool (this does not disconnect)
+                connection.close()
+    
+    finally:
+        # Let the next waiting thread borrow a connection (even if giving
+        # the connection back failed, so the count never drifts)
+        _pool_slots.release()
+
+@contextmanager
+def transaction(connection):
+    """
+    Context manager that runs a group of write queries as one transaction.
+    Use it as "with transaction(connection) as cursor:" - if the block
+    finishes normally everything is committed with a single COMMIT, and if
+    any query raises an error all of the block's changes are rolled back.
+    The pool's connections use autocommit, so the transaction is started
+    here explicitly; reads outside this block need no transaction at all.
+    
+    Args:
+        connection: A connection borrowed with get_conn()
+    
+    Yields:
+        cursor: A cursor for running the block's queries
+    """
+    
+    # Start the transaction (autocommit would otherwise save every query
+    # on its own, and a failure could leave a write only half saved)
+    connection.start_transaction()
+    
+    # Open a cursor; the with-block closes it again when we are done
+    with connection.cursor() as cursor:
+        try:
+            # Run the queries inside the caller's with-block
+            yield cursor
+            
+        except BaseException:
+            # Something went wrong, so undo every change made in this block
+            connection.rollback()
+            # Let the caller's error handling see the original error
+            raise
+        
+        # Everything worked, so save all the changes at once
+        connection.commit()
+
+# ============================================================================
+# PASSWORD HASHING
+# ============================================================================
+
+# Shared Argon2 hasher using the OWASP recommended settings
+# time_cost: Number of passes over the memory
+# memory_cost: Memory used per hash in KiB (19456 KiB = 19 MiB)
+# parallelism: Number of threads used per hash
+# The routes call the database functions through asyncio.to_thread, so the
+# few milliseconds spent hashing never block the event loop
+password_hasher = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+
+def hash_password(password):
+    """
+    Hashes a password with Argon2 so it can be stored safely.
+    Every call uses a new random salt, so the same password gives a
+    different hash each time.
+    
+    Args:
+        password: The plain text password entered by the user
+    
+    Returns:
+        str: The Argon2 hash (starts with "$argon2id$")
+    """
+    
+    # Hash the password (the salt and settings are stored inside the hash)
+    return password_hasher.hash(password)
+
+def check_password(stored_password, password):
+    """
+    Checks a password against the value stored in the users table.
+    Accounts created before passwords were hashed still hold plain text,
+    so those are compared directly and upgraded on the next login.
+    
+    Args:
+        stored_password: The value from the password column
+        password: The plain text password entered by the user
+    
+    Returns:
+        dict: Contains 'matches' (bool) and 'needs_rehash' (bool) keys
+    """
+    
+    # Old accounts store the password as plain text
+    if not stored_password.startswith("$argon2"):
+        # compare_digest takes the same time whether or not the values match
+        matches = hmac.compare_digest(stored_password.encode("utf-8"), password.encode("utf-8"))
+        # A matching plain text password should be replaced with a hash
+        return {"matches": matches, "needs_rehash": matches}
+    
+    try:
+        # Check the password against the Argon2 hash (constant-time, in C)
+        password_hasher.verify(stored_password, password)
+        
+    except (VerificationError, InvalidHashError):
+        # Wrong password (or a damaged hash)
+        return {"matches": False, "needs_rehash": False}
+    
+    # The password is correct; rehash it if the hasher settings have changed
+    return {"matches": True, "needs_rehash": password_hasher.check_needs_rehash(stored_password)}
+
+# ============================================================================
+# LOGIN CACHE (skip the slow Argon2 check for repeat logins)
+# ============================================================================
+
+# Checking a password with Argon2 takes tens of milliseconds of CPU on
+# purpose. When the same user logs in again with the same password, we can
+# remember that this password matched this exact stored hash and skip it.
+# The database is still asked for the stored hash on every login, so a
+# changed password (new hash), a renamed user or a deleted account is
+# noticed straight away, even when several worker processes are running.
+
+# How long (in seconds) a verified login is remembered
+LOGIN_CACHE_TTL = 3600
+
+# How many verified logins are remembered before the oldest one is dropped
+MAX_CACHED_LOGINS = 1024
+
+# The cache itself: maps a stored Argon2 hash to
+# {"fingerprint": <bytes>, "created_at": <time>}
+# Plain text passwords are never kept, only a keyed fingerprint of them
+_login_cache = {}
+
+# Lock that stops two worker threads from changing the cache at the same time
+_login_cache_lock = threading.Lock()
+
+# Random key for the fingerprints, made fresh every time the app starts
+# Without this key the fingerprints cannot be used to guess passwords
+_login_cache_key = secrets.token_bytes(32)
+
+def password_fingerprint(password):
+    """
+    Makes a keyed SHA-256 fingerprint of a password for the login cache.
+    This is fast (unlike Argon2), which is fine because the key only exists
+    in this process's memory.
+    
+    Args:
+        password: The plain text password entered by the user
+    
+    Returns:
+        bytes: The 32 byte fingerprint
+    """
+    
+    # HMAC-SHA256 of the password with the secret key
+    return hmac.new(_login_cache_key, password.encode("utf-8"), hashlib.sha256).digest()
+
+def is_cached_login(stored_password, password):
+    """
+    Checks whether this password was recently verified against this stored hash.
+    
+    Args:
+        stored_password: The Argon2 hash from the password column
+        password: The plain text password entered by the user
+    
+    Returns:
+        bool: True if the login can be accepted without running Argon2
+    """
+    
+    # Look up the cache entry for this stored hash
+    with _login_cache_lock:
+        entry = _login_cache.get(stored_password)
+    
+    # Nothing remembered, or remembered too long ago
+    if entry is None or time.monotonic() - entry["created_at"] > LOGIN_CACHE_TTL:
+        return False
+    
+    # Compare the fingerprints in constant time
+    return hmac.compare_digest(entry["fingerprint"], password_fingerprint(password))
+
+def remember_login(stored_password, password):
+    """
+    Remembers that a password matched a stored hash (see is_cached_login).
+    
+    Args:
+        stored_password: The Argon2 hash from the password column
+        password: The plain text password that matched it
+    """
+    
+    # Build the new cache entry
+    entry = {"fingerprint": password_fingerprint(password), "created_at": time.monotonic()}
+    
+    with _login_cache_lock:
+        # Make room by dropping the oldest login if the cache is full
+        # (dictionaries remember insertion order, so the first key is the oldest)
+        if stored_password not in _login_cache and len(_login_cache) >= MAX_CACHED_LOGINS:
+            del _login_cache[next(iter(_login_cache))]
+        
+        # Save the entry for this stored hash
+        _login_cache[stored_password] = entry
+
+# ============================================================================
+# LEADERBOARD CACHE
+# ============================================================================
+
+# The last leaderboard read from the database
+# Looks like {"created_at": <time>, "result": <get_leaderboard result>}
+# or None when there is nothing cached
+_leaderboard_cache = None
+
+# Lock that stops two worker threads from changing the cache at the same time
+_leaderboard_lock = threading.Lock()
+
+def clear_leaderboard_cache():
+    """
+    Throws away the cached leaderboard so the next request reads it again.
+    Called after every change that can move players on the leaderboard
+    (new accounts, finished games, renamed or deleted accounts).
+    Other worker processes keep their copy until LEADERBOARD_CACHE_TTL runs out.
+    """
+    
+    # Use the global variable so the cache itself is changed
+    global _leaderboard_cache
+    
+    # Remove the cached leaderboard
+    with _leaderboard_lock:
+        _leaderboard_cache = None
+
+def get_cached_leaderboard(limit, offset):
+    """
+    Returns the cached leaderboard if it is the page being asked for and
+    it is recent enough. Only the first page is ever cached, because it is
+    what almost everyone asks for.
+    
+    Args:
+        limit: The page size that was asked for
+        offset: How many of the best players to skip
+    
+    Returns:
+        dict: A copy of the cached result, or None if it has to be read again
+    """
+    
+    # Other pages are never cached
+    if limit != LEADERBOARD_LIMIT or offset != 0:
+        return None
+    
+    # Read the cache
+    with _leaderboard_lock:
+        cached = _leaderboard_cache
+    
+    # Nothing cached yet, or it is too old
+    if cached is None or time.monotonic() - cached["created_at"] > LEADERBOARD_CACHE_TTL:
+        return None
+    
+    # Return a copy, so the caller can add keys without changing the cache
+    return {**cached["result"]}
+
+def save_leaderboard(leaderboard_list, limit, offset):
+    """
+    Turns the rows of _SQL_LEADERBOARD into the get_leaderboard result and
+    caches it if it is the first page.
+    
+    Args:
+        leaderboard_list: The rows read from the database (list of dicts)
+        limit: The page size that was asked for
+        offset: How many of the best players were skipped
+    
+    Returns:
+        dict: The leaderboard result (a copy, safe for the caller to change)
+    """
+    
+    # Use the global variable so the cache can be filled in below
+    global _leaderboard_cache
+    
+    # Every row carries the same total, so read it once (0 if there are no users)
+    total_players = leaderboard_list[0]["total_players"] if leaderboard_list else 0
+    
+    # Remove the repeated total from the rows themselves
+    for entry in leaderboard_list:
+        del entry["total_players"]
+    
+    # The leaderboard list and the total number of players
+    result = {"success": True, "leaderboard": leaderboard_list, "total_players": total_players}
+    
+    # Save the first page for the next LEADERBOARD_CACHE_TTL seconds
+    if limit == LEADERBOARD_LIMIT and offset == 0:
+        with _leaderboard_lock:
+            _leaderboard_cache = {"created_at": time.monotonic(), "result": result}
+    
+    # Return a copy, so the caller can add keys without changing the cache
+    return {**result}
+
+# ============================================================================
+# SQL QUERIES (read on almost every page load)
+# ============================================================================
+
+# All queries are defined once here (and in SQL QUERIES (writes) below)
+# instead of inside each function, so every call sends exactly the same SQL
+# text to the server
+#
+# Note: these run as normal (text protocol) queries, not prepared
+# statements. mysql-connector sends an extra COM_STMT_RESET round trip
+# before every prepared EXECUTE (plus PREPARE/CLOSE for each new cursor),
+# and for queries this small the round trips cost far more than the
+# server spends parsing the SQL.
+
+# Find a user by username for login (usernames are UNIQUE, so at most one row)
+_SQL_LOGIN = "SELECT user_id, password FROM users WHERE username = %s"
+
+# Get a user's username, games_played, and games_won
+_SQL_STATS = """
+    SELECT username, games_played, games_won 
+    FROM users 
+    WHERE user_id = %s
+"""
+
+# Format string for DATE_FORMAT, which turns a DATETIME into text like
+# "2025-01-31 14:05" inside MySQL, so Python never has to build a datetime
+# object and convert it again for every row
+# %i is MySQL's code for minutes. It is written with a single % because
+# mysql-connector only replaces %s placeholders and leaves other % as they are
+SQL_DATE_FORMAT = "%Y-%m-%d %H:%i"
+
+# Get all game history for a user, with played_at already formatted as text
+# ORDER BY game_history.played_at DESC means most recent games appear first
+# (the table name makes MySQL sort by the real DATETIME column, not by the
+# formatted text that has the same name)
+# LIMIT and OFFSET return one page of games. The idx_history_user_played
+# index (see database.sql) keeps each user's games sorted newest first, so
+# MySQL reads just that page instead of sorting the whole history
+_SQL_HISTORY = f"""
+    SELECT history_id, topic, score, result, DATE_FORMAT(played_at, '{SQL_DATE_FORMAT}') AS played_at 
+    FROM game_history 
+    WHERE user_id = %s 
+    ORDER BY game_history.played_at DESC
+    LIMIT %s OFFSET %s
+"""
+
+# Get the top players with their stats and rank for the leaderboard
+# The inner query calculates each player's win_rate
+# CASE WHEN prevents division by zero when games_played is 0
+# ROW_NUMBER() numbers the players 1, 2, 3, ... by win_rate DESC (highest
+# win rates first), and by games_played DESC when win rates are equal
+# (more games = higher rank), so Python does not have to add the ranks
+# COUNT(*) OVER () counts every player before LIMIT is applied, so the page
+# can still say "ranked X out of Y players" without a second round trip
+# LIMIT and OFFSET keep one page of players (the ranks are still counted
+# over all players, so the second page starts at rank 101)
+# (`rank` needs backticks because RANK is a reserved word in MySQL 8)
+_SQL_LEADERBOARD = """
+    SELECT 
+        user_id,
+        username, 
+        games_played, 
+        games_won,
+        win_rate,
+        ROW_NUMBER() OVER (ORDER BY win_rate DESC, games_played DESC) AS `rank`,
+        COUNT(*) OVER () AS total_players
+    FROM (
+        SELECT 
+            user_id,
+            username, 
+            games_played, 
+            games_won,
+            CASE 
+                WHEN games_played > 0 
+                THEN ROUND((games_won / games_played) * 100, 1) 
+                ELSE 0 
+            END AS win_rate
+        FROM users
+    ) AS player_stats
+    ORDER BY `rank`
+    LIMIT %s OFFSET %s
+"""
+
+# Get everything the account page shows in one query: the user's basic
+# information and their game statistics
+# created_at comes back already formatted as text (see SQL_DATE_FORMAT)
+_SQL_USER_INFO = f"""
+    SELECT username, games_played, games_won, DATE_FORMAT(created_at, '{SQL_DATE_FORMAT}') AS created_at 
+    FROM users 
+    WHERE user_id = %s
+"""
+
+# Get the stored password hash, so update_password can check the current password
+_SQL_VERIFY_PASSWORD = "SELECT password FROM users WHERE user_id = %s"
+
+# ============================================================================
+# SQL QUERIES (writes)
+# ============================================================================
+
+# Insert a new user
+# games_played and games_won will default to 0 as defined in the table
+# created_at will automatically be set to the current timestamp
+# The username column is UNIQUE (see database.sql), so MySQL itself refuses
+# a name that is already used
+_SQL_CREATE_USER = "INSERT INTO users (username, password) VALUES (%s, %s)"
+
+# Insert one game history entry (used with executemany for many games)
+# played_at will automatically be set to the current timestamp
+_SQL_INSERT_HISTORY = """
+    INSERT INTO game_history (user_id, topic, score, result) 
+    VALUES (%s, %s, %s, %s)
+"""
+
+# Add a number of played and won games to a user's counters
+# Both counters are changed by the same UPDATE, so MySQL finds and locks
+# the user's row only once
+_SQL_ADD_STATS = """
+    UPDATE users 
+    SET games_played = games_played + %s, 
+        games_won = games_won + %s 
+    WHERE user_id = %s
+"""
+
+# Insert the game history entry and update the user's counters, sent to
+# MySQL together in one batch (run with multi=True)
+# It is built from the two queries above, so saving one game and saving
+# many games (create_game_histories) always run the same SQL
+_SQL_SAVE_GAME = _SQL_INSERT_HISTORY.rstrip() + ";" + _SQL_ADD_STATS
+
+# Change a user's username
+# The username column is UNIQUE, so MySQL refuses a name that someone else
+# already has (keeping your own name is allowed)
+_SQL_UPDATE_USERNAME = "UPDATE users SET username = %s WHERE user_id = %s"
+
+# Change a user's password, but only if the stored hash is still the one
+# that was checked ("AND password = %s"), so a password changed in the
+# meantime (for example from another tab) is not silently overwritten
+# Also used to store the new hash after a login that needs a rehash
+_SQL_UPDATE_PASSWORD = "UPDATE users SET password = %s WHERE user_id = %s AND password = %s"
+
+# Delete one history entry, but only if it belongs to this user
+# This prevents users from deleting other users' history
+_SQL_DELETE_HISTORY_ENTRY = "DELETE FROM game_history WHERE history_id = %s AND user_id = %s"
+
+# Delete the user's game history, then the user, sent to MySQL together in
+# one batch (run with multi=True)
+# ON DELETE CASCADE would also remove the history, but it does so one row at
+# a time while deleting the user. Deleting it first reads all of the user's
+# games in one go through the idx_history_user_played index, and the
+# cascade then has nothing left to do
+_SQL_DELETE_USER = """
+    DELETE FROM game_history WHERE user_id = %s;
+    DELETE FROM users WHERE user_id = %s
+"""
+
 # ============================================================================
 # CREATE OPERATIONS
 # ============================================================================
@@ -59,68 +700,61 @@ def create_user(username, password):
     
     Args:
         username: The desired username for the new account
-        password: The password for the new account (stored as plain text)
+        password: The password for the new account (stored as an Argon2 hash)
     
     Returns:
         dict: Contains 'success' (bool) and 'message' (str) keys
     """
     
-    # Get a connection to the database
-    connection = get_db_connection()
-    
-    # Check if the connection was successful
-    if connection is None:
-        # Return error if we cannot connect to the database
-        return {"success": False, "message": "Database connection failed"}
+    # Hash the password before borrowing a connection, so no pooled
+    # connection (and no lock) is held while Argon2 is working
+    # The plain text password is never saved in the database
+    stored_password = hash_password(password)
     
-    try:
-        # Create a cursor object to execute SQL queries
-        # A cursor is like a pointer that helps us run commands and fetch results
-        cursor = connection.cursor()
-        
-        # First, check if the username already exists in the database
-        # We use %s as a placeholder to prevent SQL injection attacks
-        check_query = "SELECT user_id FROM users WHERE username = %s"
-        
-        # Execute the query with the username as a parameter
-        # The second argument must be a tuple, hence the comma after username
-        cursor.execute(check_query, (username,))
-        
-        # Fetch one result from the query
-        existing_user = cursor.fetchone()
-        
-        # If a user with this username already exists
-        if existing_user is not None:
-            # Close the cursor and connection to free up resources
-            cursor.close()
-            connection.close()
-            # Return error message indicating username is taken
-            return {"success": False, "message": "Username already exists"}
-        
-        # If username is available, insert the new user into the database
-        # games_played and games_won will default to 0 as defined in the table
-        # created_at will automatically be set to the current timestamp
-        insert_query = "INSERT INTO users (username, password) VALUES (%s, %s)"
-        
-        # Execute the insert query with username and password as parameters
-        cursor.execute(insert_query, (username, password))
-        
-        # Commit the transaction to save the changes to the database
-        # Without commit, the changes would not be permanently saved
-        connection.commit()
+    # Borrow a connection from the pool
+    # The with-block hands it back to the pool when the function is done
+    with get_conn() as connection:
         
-        # Close the cursor and connection to free up resources
-        cursor.close()
-        connection.close()
-        
-        # Return success message
-        return {"success": True, "message": "Account created successfully"}
-        
-    except Error as e:
-        # If any database error occurs, print it for debugging
-        print(f"Error creating user: {e}")
-        # Return error message
-        return {"success": False, "message": "Failed to create account"}
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed"}
+        
+        try:
+            # Open a cursor inside a transaction
+            # The changes are committed when the block finishes, or rolled back
+            # if any query fails, so a write is never only half saved
+            with transaction(connection) as cursor:
+                
+                # Insert the new user into the database (see _SQL_CREATE_USER)
+                # We use %s placeholders to prevent SQL injection attacks
+                # MySQL refuses a username that is already used, which saves a
+                # separate SELECT first, and two people signing up with the
+                # same name at the same moment cannot both get it
+                cursor.execute(_SQL_CREATE_USER, (username, stored_password))
+            
+            # The new player is now saved, so the cached leaderboard is out of date
+            clear_leaderboard_cache()
+            
+            # Return success message
+            return {"success": True, "message": "Account created successfully"}
+            
+        except IntegrityError as e:
+            # A user with this username already exists
+            if e.errno == errorcode.ER_DUP_ENTRY:
+                # Return error message indicating username is taken
+                return {"success": False, "message": "Username already exists"}
+            
+            # Any other broken rule is a real error
+            logger.error("Error creating user: %s", e)
+            # Return error message
+            return {"success": False, "message": "Failed to create account"}
+            
+        except Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error creating user: %s", e)
+            # Return error message
+            return {"success": False, "message": "Failed to create account"}
 
 def create_game_history(user_id, topic, score, result):
     """
@@ -137,65 +771,114 @@ def create_game_history(user_id, topic, score, result):
         dict: Contains 'success' (bool) and 'message' (str) keys
     """
     
-    # Get a connection to the database
-    connection = get_db_connection()
+    # Borrow a connection from the pool
+    # The with-block hands it back to the pool when the function is done
+    with get_conn() as connection:
+        
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed"}
+        
+        try:
+            # Open a cursor inside a transaction
+            # The changes are committed when the block finishes, or rolled back
+            # if any query fails, so a write is never only half saved
+            with transaction(connection) as cursor:
+                
+                # Insert the game history entry and update the user's counters
+                # (see _SQL_SAVE_GAME)
+                # games_played always goes up by 1
+                # games_won goes up by 1 only for a win (score >= 7)
+                games_won = 1 if result == "WON" else 0
+                
+                # Execute both statements in a single round trip
+                # multi=True gives back one result per statement, and the loop
+                # reads them all so both statements are run before the commit
+                for _ in cursor.execute(_SQL_SAVE_GAME, (user_id, topic, score, result, 1, games_won, user_id), multi=True):
+                    pass
+                
+            # The new stats are now saved, so the cached leaderboard is out of date
+            clear_leaderboard_cache()
+            
+            # Return success message
+            return {"success": True, "message": "Game history saved successfully"}
+            
+        except Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error creating game history: %s", e)
+            # Return error message
+            return {"success": False, "message": "Failed to save game history"}
+
+def create_game_histories(entries):
+    """
+    Saves many finished games at once (for example when importing games
+    or retrying saves that failed earlier).
+    Does the same as calling create_game_history once per game, but in a
+    single transaction with far fewer round trips to MySQL.
     
-    # Check if the connection was successful
-    if connection is None:
-        # Return error if we cannot connect to the database
-        return {"success": False, "message": "Database connection failed"}
+    Args:
+        entries: A list of (user_id, topic, score, result) tuples, one per
+                 game, where result is either 'WON' or 'LOST'
     
-    try:
-        # Create a cursor object to execute SQL queries
-        cursor = connection.cursor()
-        
-        # Insert the game history entry into the game_history table
-        # played_at will automatically be set to the current timestamp
-        insert_query = """
-            INSERT INTO game_history (user_id, topic, score, result) 
-            VALUES (%s, %s, %s, %s)
-        """
-        
-        # Execute the insert query with all the game details
-        cursor.execute(insert_query, (user_id, topic, score, result))
-        
-        # Update the user's games_played counter by adding 1
-        update_games_played_query = """
-            UPDATE users 
-            SET games_played = games_played + 1 
-            WHERE user_id = %s
-        """
-        
-        # Execute the update query for games_played
-        cursor.execute(update_games_played_query, (user_id,))
-        
-        # If the user won the game (score >= 7), also update games_won
-        if result == "WON":
-            # Update the user's games_won counter by adding 1
-            update_games_won_query = """
-                UPDATE users 
-                SET games_won = games_won + 1 
-                WHERE user_id = %s
-            """
-            
-            # Execute the update query for games_won
-            cursor.execute(update_games_won_query, (user_id,))
-        
-        # Commit all the transactions to save changes to the database
-        connection.commit()
-        
-        # Close the cursor and connection to free up resources
-        cursor.close()
-        connection.close()
-        
-        # Return success message
-        return {"success": True, "message": "Game history saved successfully"}
+    Returns:
+        dict: Contains 'success' (bool), 'message' (str), and 'saved' (int),
+              the number of games that were saved
+    """
+    
+    # Nothing to save, so there is no need to borrow a connection
+    if not entries:
+        return {"success": True, "message": "No games to save", "saved": 0}
+    
+    # Add up how many games each user played and won in this batch
+    # Looks like {user_id: [games_played, games_won]}
+    stat_changes = {}
+    for user_id, topic, score, result in entries:
+        # Start at 0 games for users we have not seen in this batch yet
+        changes = stat_changes.setdefault(user_id, [0, 0])
+        # Every game counts as played
+        changes[0] += 1
+        # Only a win counts as won
+        changes[1] += result == "WON"
+    
+    # Borrow a connection from the pool
+    # The with-block hands it back to the pool when the function is done
+    with get_conn() as connection:
         
-    except Error as e:
-        # If any database error occurs, print it for debugging
-        print(f"Error creating game history: {e}")
-        # Return error message
-        return {"success": False, "message": "Failed to save game history"}
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed", "saved": 0}
+        
+        try:
+            # Open a cursor inside a transaction
+            # Either every game in the batch is saved, or none of them are
+            with transaction(connection) as cursor:
+                
+                # Insert all the game history entries (see _SQL_INSERT_HISTORY)
+                # executemany turns the single-row INSERT into one INSERT with
+                # a row for every game, so they are all sent in one round trip
+                cursor.executemany(_SQL_INSERT_HISTORY, entries)
+                
+                # Update each user's counters once with their totals from the
+                # batch, instead of once per game (see _SQL_ADD_STATS)
+                # (a batch usually belongs to one or a few users)
+                cursor.executemany(
+                    _SQL_ADD_STATS,
+                    [(played, won, user_id) for user_id, (played, won) in stat_changes.items()]
+                )
+            
+            # The new stats are now saved, so the cached leaderboard is out of date
+            clear_leaderboard_cache()
+            
+            # Return success message with the number of saved games
+            return {"success": True, "message": "Game history saved successfully", "saved": len(entries)}
+            
+        except Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error creating game histories: %s", e)
+            # Return error message
+            return {"success": False, "message": "Failed to save game history", "saved": 0}
 
 # ============================================================================
 # READ OPERATIONS
@@ -214,46 +897,102 @@ def verify_user_login(username, password):
         dict: Contains 'success' (bool), 'message' (str), and 'user_id' (int) if successful
     """
     
-    # Get a connection to the database
-    connection = get_db_connection()
+    # Borrow a connection from the pool only to read the stored hash
+    # The with-block hands it back before the slow password check below, so
+    # logins never hold a pooled connection while Argon2 is working
+    with get_conn() as connection:
+        
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed", "user_id": None}
+        
+        try:
+            # Create a cursor object to execute SQL queries
+            with connection.cursor() as cursor:
+                
+                # Find the user with the given username (see _SQL_LOGIN)
+                # The password is checked against the stored hash in Python below
+                cursor.execute(_SQL_LOGIN, (username,))
+                
+                # Fetch one result from the query
+                user = cursor.fetchone()
+            
+        except Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error verifying login: %s", e)
+            # Return error message
+            return {"success": False, "message": "Login failed", "user_id": None}
     
-    # Check if the connection was successful
-    if connection is None:
-        # Return error if we cannot connect to the database
-        return {"success": False, "message": "Database connection failed", "user_id": None}
+    # No user with this username
+    if user is None:
+        # Return the same message as a wrong password so usernames cannot be guessed
+        return {"success": False, "message": "Invalid username or password", "user_id": None}
     
-    try:
-        # Create a cursor object to execute SQL queries
-        cursor = connection.cursor()
-        
-        # Query to find a user with the given username and password
-        # If both match, the user's credentials are correct
-        login_query = "SELECT user_id FROM users WHERE username = %s AND password = %s"
-        
-        # Execute the query with username and password as parameters
-        cursor.execute(login_query, (username, password))
-        
-        # Fetch one result from the query
-        user = cursor.fetchone()
-        
-        # Close the cursor and connection to free up resources
-        cursor.close()
-        connection.close()
-        
-        # If a matching user was found
-        if user is not None:
-            # Return success with the user's ID
-            # user[0] contains the user_id from the query result
-            return {"success": True, "message": "Login successful", "user_id": user[0]}
-        else:
-            # No matching user found - either username or password is wrong
-            return {"success": False, "message": "Invalid username or password", "user_id": None}
-        
-    except Error as e:
-        # If any database error occurs, print it for debugging
-        print(f"Error verifying login: {e}")
-        # Return error message
-        return {"success": False, "message": "Login failed", "user_id": None}
+    # user[0] contains the user_id and user[1] the stored password hash
+    user_id, stored_password = user
+    
+    # The same password matched this same hash recently, so skip Argon2
+    if is_cached_login(stored_password, password):
+        return {"success": True, "message": "Login successful", "user_id": user_id}
+    
+    # Check the entered password against the stored hash
+    password_check = check_password(stored_password, password)
+    
+    # Wrong password
+    if not password_check["matches"]:
+        return {"success": False, "message": "Invalid username or password", "user_id": None}
+    
+    # Upgrade old plain text passwords (or hashes made with older
+    # settings) now that we know the correct password
+    if password_check["needs_rehash"]:
+        # Hash first, then borrow a connection only for the UPDATE
+        new_stored_password = hash_password(password)
+        
+        # If the database cannot be reached (or the UPDATE fails) the login
+        # still succeeds, since the password was correct; the upgrade is
+        # simply tried again on the next login
+        with get_conn() as connection:
+            if connection is not None:
+                try:
+                    # Only replace the hash we checked (see _SQL_UPDATE_PASSWORD),
+                    # so a password changed since it was read is kept
+                    with transaction(connection) as cursor:
+                        cursor.execute(_SQL_UPDATE_PASSWORD, (new_stored_password, user_id, stored_password))
+                        
+                        # The new hash is the stored one only if the row changed
+                        if cursor.rowcount == 1:
+                            stored_password = new_stored_password
+                    
+                except Error as e:
+                    # Log the error for debugging
+                    logger.error("Error upgrading password hash: %s", e)
+    
+    # Remember this login so the next one can skip Argon2
+    remember_login(stored_password, password)
+    
+    # Return success with the user's ID
+    return {"success": True, "message": "Login successful", "user_id": user_id}
+
+def calculate_win_rate(games_played, games_won):
+    """
+    Calculates a user's win rate as a percentage.
+    
+    Args:
+        games_played: Total number of games the user has played
+        games_won: Number of those games the user won
+    
+    Returns:
+        float: The win rate rounded to 1 decimal (0 if no games were played)
+    """
+    
+    # Avoid division by zero if no games have been played
+    if games_played > 0:
+        # Calculate percentage: (wins / total) * 100, rounded to 1 decimal
+        return round((games_won / games_played) * 100, 1)
+    
+    # If no games played, win rate is 0
+    return 0
 
 def get_user_stats(user_id):
     """
@@ -267,193 +1006,145 @@ def get_user_stats(user_id):
         dict: Contains user statistics or error information
     """
     
-    # Get a connection to the database
-    connection = get_db_connection()
-    
-    # Check if the connection was successful
-    if connection is None:
-        # Return error if we cannot connect to the database
-        return {"success": False, "message": "Database connection failed"}
-    
-    try:
-        # Create a cursor with dictionary=True to get results as dictionaries
-        # This makes it easier to access columns by name instead of index
-        cursor = connection.cursor(dictionary=True)
-        
-        # Query to get user's username, games_played, and games_won
-        stats_query = """
-            SELECT username, games_played, games_won 
-            FROM users 
-            WHERE user_id = %s
-        """
-        
-        # Execute the query with user_id as parameter
-        cursor.execute(stats_query, (user_id,))
-        
-        # Fetch the result
-        user_stats = cursor.fetchone()
-        
-        # Close the cursor and connection to free up resources
-        cursor.close()
-        connection.close()
-        
-        # If user was found
-        if user_stats is not None:
-            # Calculate win rate percentage
-            # Avoid division by zero if no games have been played
-            if user_stats["games_played"] > 0:
-                # Calculate percentage: (wins / total) * 100, rounded to 1 decimal
-                win_rate = round((user_stats["games_won"] / user_stats["games_played"]) * 100, 1)
-            else:
-                # If no games played, win rate is 0
-                win_rate = 0
-            
-            # Return the stats with calculated win rate
-            return {
-                "success": True,
-                "username": user_stats["username"],
-                "games_played": user_stats["games_played"],
-                "games_won": user_stats["games_won"],
-                "win_rate": win_rate
-            }
-        else:
-            # User not found in database
-            return {"success": False, "message": "User not found"}
+    # Borrow a connection from the pool
+    # The with-block hands it back to the pool when the function is done
+    with get_conn() as connection:
         
-    except Error as e:
-        # If any database error occurs, print it for debugging
-        print(f"Error getting user stats: {e}")
-        # Return error message
-        return {"success": False, "message": "Failed to retrieve stats"}
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed"}
+        
+        try:
+            # Create a cursor with dictionary=True to get results as dictionaries
+            # This makes it easier to access columns by name instead of index
+            with connection.cursor(dictionary=True) as cursor:
+                
+                # Get the user's username, games_played, and games_won (see _SQL_STATS)
+                cursor.execute(_SQL_STATS, (user_id,))
+                
+                # Fetch the result
+                user_stats = cursor.fetchone()
+                
+                # If user was found
+                if user_stats is not None:
+                    # Return the stats with calculated win rate
+                    return {
+                        "success": True,
+                        "username": user_stats["username"],
+                        "games_played": user_stats["games_played"],
+                        "games_won": user_stats["games_won"],
+                        "win_rate": calculate_win_rate(user_stats["games_played"], user_stats["games_won"])
+                    }
+                else:
+                    # User not found in database
+                    return {"success": False, "message": "User not found"}
+            
+        except Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error getting user stats: %s", e)
+            # Return error message
+            return {"success": False, "message": "Failed to retrieve stats"}
 
-def get_game_history(user_id):
+def get_game_history(user_id, limit=HISTORY_LIMIT, offset=0):
     """
-    Retrieves all game history entries for a specific user.
+    Retrieves one page of game history entries for a specific user.
     Results are ordered by most recent game first.
     
     Args:
         user_id: The ID of the user whose history we want to retrieve
+        limit: The most entries to return (HISTORY_LIMIT by default)
+        offset: How many of the most recent entries to skip (0 = first page)
     
     Returns:
         dict: Contains list of game history entries or error information
     """
     
-    # Get a connection to the database
-    connection = get_db_connection()
-    
-    # Check if the connection was successful
-    if connection is None:
-        # Return error if we cannot connect to the database
-        return {"success": False, "message": "Database connection failed", "history": []}
-    
-    try:
-        # Create a cursor with dictionary=True to get results as dictionaries
-        cursor = connection.cursor(dictionary=True)
-        
-        # Query to get all game history for this user
-        # ORDER BY played_at DESC means most recent games appear first
-        history_query = """
-            SELECT history_id, topic, score, result, played_at 
-            FROM game_history 
-            WHERE user_id = %s 
-            ORDER BY played_at DESC
-        """
-        
-        # Execute the query with user_id as parameter
-        cursor.execute(history_query, (user_id,))
-        
-        # Fetch all results (not just one)
-        history_list = cursor.fetchall()
+    # Borrow a connection from the pool
+    # The with-block hands it back to the pool when the function is done
+    with get_conn() as connection:
         
-        # Close the cursor and connection to free up resources
-        cursor.close()
-        connection.close()
-        
-        # Convert datetime objects to strings for JSON serialization
-        # JSON cannot directly serialize Python datetime objects
-        for entry in history_list:
-            # Convert the played_at datetime to a formatted string
-            entry["played_at"] = entry["played_at"].strftime("%Y-%m-%d %H:%M")
-        
-        # Return the history list
-        return {"success": True, "history": history_list}
-        
-    except Error as e:
-        # If any database error occurs, print it for debugging
-        print(f"Error getting game history: {e}")
-        # Return error message with empty history list
-        return {"success": False, "message": "Failed to retrieve history", "history": []}
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed", "history": []}
+        
+        try:
+            # Create a cursor with dictionary=True to get results as dictionaries
+            with connection.cursor(dictionary=True) as cursor:
+                
+                # Get one page of game history for this user, most recent first (see _SQL_HISTORY)
+                cursor.execute(_SQL_HISTORY, (user_id, limit, offset))
+                
+                # Fetch all results (not just one)
+                # played_at is already a formatted string, ready for JSON
+                history_list = cursor.fetchall()
+                
+                # Return the history list
+                return {"success": True, "history": history_list}
+            
+        except Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error getting game history: %s", e)
+            # Return error message with empty history list
+            return {"success": False, "message": "Failed to retrieve history", "history": []}
 
-def get_leaderboard():
+def get_leaderboard(limit=LEADERBOARD_LIMIT, offset=0):
     """
-    Retrieves all users ranked by their win rate.
+    Retrieves one page of users ranked by their win rate.
     Used to display the leaderboard page.
+    Only LEADERBOARD_LIMIT players are returned by default, so the page stays
+    small no matter how many accounts exist.
+    The first page (the one the leaderboard page shows) is cached for
+    LEADERBOARD_CACHE_TTL seconds.
+    
+    Args:
+        limit: The most players to return (LEADERBOARD_LIMIT by default)
+        offset: How many of the best players to skip (0 = first page)
     
     Returns:
-        dict: Contains list of users with their rankings or error information
+        dict: Contains list of users with their rankings, the total number
+              of players, or error information
     """
     
-    # Get a connection to the database
-    connection = get_db_connection()
+    # Serve the cached leaderboard if it is recent enough
+    cached = get_cached_leaderboard(limit, offset)
+    if cached is not None:
+        return cached
     
-    # Check if the connection was successful
-    if connection is None:
-        # Return error if we cannot connect to the database
-        return {"success": False, "message": "Database connection failed", "leaderboard": []}
-    
-    try:
-        # Create a cursor with dictionary=True to get results as dictionaries
-        cursor = connection.cursor(dictionary=True)
-        
-        # Query to get all users with their stats
-        # We calculate win_rate in the query itself
-        # CASE WHEN prevents division by zero when games_played is 0
-        # ORDER BY win_rate DESC puts highest win rates first
-        # If win rates are equal, sort by games_played DESC (more games = higher rank)
-        leaderboard_query = """
-            SELECT 
-                user_id,
-                username, 
-                games_played, 
-                games_won,
-                CASE 
-                    WHEN games_played > 0 
-                    THEN ROUND((games_won / games_played) * 100, 1) 
-                    ELSE 0 
-                END as win_rate
-            FROM users 
-            ORDER BY win_rate DESC, games_played DESC
-        """
-        
-        # Execute the query
-        cursor.execute(leaderboard_query)
-        
-        # Fetch all results
-        leaderboard_list = cursor.fetchall()
-        
-        # Close the cursor and connection to free up resources
-        cursor.close()
-        connection.close()
-        
-        # Add rank numbers to each entry
-        # Enumerate starts at 1 for proper ranking (1st, 2nd, 3rd, etc.)
-        for index, entry in enumerate(leaderboard_list, start=1):
-            # Add a 'rank' key to each entry
-            entry["rank"] = index
-        
-        # Return the leaderboard list
-        return {"success": True, "leaderboard": leaderboard_list}
+    # Borrow a connection from the pool
+    # The with-block hands it back to the pool when the function is done
+    with get_conn() as connection:
         
-    except Error as e:
-        # If any database error occurs, print it for debugging
-        print(f"Error getting leaderboard: {e}")
-        # Return error message with empty leaderboard list
-        return {"success": False, "message": "Failed to retrieve leaderboard", "leaderboard": []}
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed", "leaderboard": []}
+        
+        try:
+            # Create a cursor with dictionary=True to get results as dictionaries
+            with connection.cursor(dictionary=True) as cursor:
+                
+                # Get one page of ranked players and the total number of players (see _SQL_LEADERBOARD)
+                cursor.execute(_SQL_LEADERBOARD, (limit, offset))
+                
+                # Fetch all results
+                leaderboard_list = cursor.fetchall()
+            
+            # Build (and cache) the result from the rows
+            return save_leaderboard(leaderboard_list, limit, offset)
+            
+        except Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error getting leaderboard: %s", e)
+            # Return error message with empty leaderboard list
+            return {"success": False, "message": "Failed to retrieve leaderboard", "leaderboard": []}
 
 def get_user_info(user_id):
     """
-    Retrieves basic information for a specific user.
-    Used for the account page display.
+    Retrieves basic information and game statistics for a specific user.
+    Used for the account page display, which needs both, so they are read
+    with a single query instead of a second get_user_stats call.
     
     Args:
         user_id: The ID of the user whose info we want to retrieve
@@ -462,51 +1153,348 @@ def get_user_info(user_id):
         dict: Contains user info or error information
     """
     
-    # Get a connection to the database
-    connection = get_db_connection()
+    # Borrow a connection from the pool
+    # The with-block hands it back to the pool when the function is done
+    with get_conn() as connection:
+        
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed"}
+        
+        try:
+            # Create a cursor with dictionary=True to get results as dictionaries
+            with connection.cursor(dictionary=True) as cursor:
+                
+                # Get the user's basic information and stats (see _SQL_USER_INFO)
+                cursor.execute(_SQL_USER_INFO, (user_id,))
+                
+                # Fetch the result
+                user_info = cursor.fetchone()
+                
+                # If user was found
+                if user_info is not None:
+                    # Add the win rate, calculated the same way as in get_user_stats
+                    user_info["win_rate"] = calculate_win_rate(user_info["games_played"], user_info["games_won"])
+                    
+                    # Return the user info
+                    return {"success": True, "user": user_info}
+                else:
+                    # User not found in database
+                    return {"success": False, "message": "User not found"}
+            
+        except Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error getting user info: %s", e)
+            # Return error message
+            return {"success": False, "message": "Failed to retrieve user info"}
+
+# ============================================================================
+# ASYNC READ OPERATIONS (aiomysql)
+# ============================================================================
+
+# The read queries behind the pages everyone opens (home stats, history,
+# leaderboard, account) also have async versions. The Quart routes await
+# these directly on the event loop, so many of them can wait for MySQL at
+# the same time without each one holding a worker thread.
+# The functions above are kept for writes, logins (Argon2 needs a thread
+# anyway) and any code that is not async.
+
+def for_aiomysql(sql):
+    """
+    Adjusts a query written for mysql-connector so aiomysql can run it.
+    aiomysql fills in the %s placeholders with Python's % operator, so every
+    other % (like the ones in SQL_DATE_FORMAT) has to be written as %%.
+    mysql-connector only replaces %s and would send %% as it is, which is
+    why the queries above keep single % signs.
     
-    # Check if the connection was successful
-    if connection is None:
-        # Return error if we cannot connect to the database
-        return {"success": False, "message": "Database connection failed"}
+    Args:
+        sql: The query text with single % signs
+    
+    Returns:
+        str: The same query with every % that is not part of %s doubled
+    """
+    
+    # Double each % that is not followed by s
+    return re.sub(r"%(?!s)", "%%", sql)
+
+# The read queries in the form aiomysql needs, worked out once at import
+_ASYNC_SQL_STATS = for_aiomysql(_SQL_STATS)
+_ASYNC_SQL_HISTORY = for_aiomysql(_SQL_HISTORY)
+_ASYNC_SQL_LEADERBOARD = for_aiomysql(_SQL_LEADERBOARD)
+_ASYNC_SQL_USER_INFO = for_aiomysql(_SQL_USER_INFO)
+
+# The async pool itself, created the first time an async query runs
+# (like the normal pool, so the app can start before MySQL is running)
+# Each worker process has its own event loop and so its own async pool
+_async_pool = None
+
+# Lock that stops two requests from creating the async pool at the same time
+_async_pool_lock = asyncio.Lock()
+
+async def get_async_pool():
+    """
+    Returns the shared aiomysql pool, creating it on first use.
+    
+    Returns:
+        Pool: The aiomysql pool that the async read functions borrow from
+    """
+    
+    # Use the global variable so every caller shares the same pool
+    global _async_pool
+    
+    # Only take the lock if the pool has not been created yet
+    if _async_pool is None:
+        async with _async_pool_lock:
+            # Check again inside the lock in case another request just made it
+            if _async_pool is None:
+                # minsize=1 opens one connection now and more only when
+                # several queries are waiting at once, up to ASYNC_POOL_SIZE
+                # autocommit=True for the same reason as the normal pool:
+                # a read never leaves a transaction open
+                _async_pool = await aiomysql.create_pool(
+                    host=DB_CONFIG["host"],          # MySQL server location
+                    user=DB_CONFIG["user"],          # MySQL username
+                    password=DB_CONFIG["password"],  # MySQL password
+                    db=DB_CONFIG["database"],        # Our database name
+                    minsize=1,                       # Connections kept open
+                    maxsize=ASYNC_POOL_SIZE,         # Most connections at once
+                    autocommit=True                  # Reads need no COMMIT
+                )
+    
+    # Return the shared pool
+    return _async_pool
+
+async def close_async_pool():
+    """
+    Closes every connection in the async pool.
+    Called by app.py when the server shuts down.
+    """
+    
+    # Use the global variable so the pool can be reset
+    global _async_pool
+    
+    # Nothing to close if no async query ever ran
+    if _async_pool is None:
+        return
+    
+    # Close the pool and wait until all its connections are gone
+    _async_pool.close()
+    await _async_pool.wait_closed()
+    _async_pool = None
+
+@asynccontextmanager
+async def get_async_conn():
+    """
+    Async context manager that borrows a connection from the async pool.
+    Use it as "async with get_async_conn() as connection:" - when the block
+    ends the connection goes back to the pool, even if an error was raised.
+    
+    Yields:
+        connection: An aiomysql connection if successful
+        None: If the connection fails
+    """
+    
+    # The pool and connection, if we manage to get them
+    pool = None
+    connection = None
     
     try:
-        # Create a cursor with dictionary=True to get results as dictionaries
-        cursor = connection.cursor(dictionary=True)
+        # Borrow a connection (this creates the pool the first time)
+        pool = await get_async_pool()
+        connection = await pool.acquire()
         
-        # Query to get user's basic information
-        info_query = """
-            SELECT username, created_at 
-            FROM users 
-            WHERE user_id = %s
-        """
+    except aiomysql.Error as e:
+        # If connection fails, log the error message for debugging
+        logger.error("Error connecting to MySQL database: %s", e)
+    
+    try:
+        # Hand the connection to the code inside the with-block
+        yield connection
         
-        # Execute the query with user_id as parameter
-        cursor.execute(info_query, (user_id,))
+    finally:
+        # Return the connection to the pool (this does not disconnect)
+        if connection is not None:
+            pool.release(connection)
+
+async def get_user_stats_async(user_id):
+    """
+    Async version of get_user_stats (see there), used by the home page.
+    
+    Args:
+        user_id: The ID of the user whose stats we want to retrieve
+    
+    Returns:
+        dict: Contains user statistics or error information
+    """
+    
+    # Borrow a connection from the async pool
+    async with get_async_conn() as connection:
+        
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed"}
+        
+        try:
+            # DictCursor gives results as dictionaries, like dictionary=True
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                
+                # Get the user's username, games_played, and games_won (see _SQL_STATS)
+                await cursor.execute(_ASYNC_SQL_STATS, (user_id,))
+                
+                # Fetch the result
+                user_stats = await cursor.fetchone()
+            
+            # User not found in database
+            if user_stats is None:
+                return {"success": False, "message": "User not found"}
+            
+            # Return the stats with calculated win rate
+            return {
+                "success": True,
+                "username": user_stats["username"],
+                "games_played": user_stats["games_played"],
+                "games_won": user_stats["games_won"],
+                "win_rate": calculate_win_rate(user_stats["games_played"], user_stats["games_won"])
+            }
+            
+        except aiomysql.Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error getting user stats: %s", e)
+            # Return error message
+            return {"success": False, "message": "Failed to retrieve stats"}
+
+async def get_game_history_async(user_id, limit=HISTORY_LIMIT, offset=0):
+    """
+    Async version of get_game_history (see there), used by the home page.
+    
+    Args:
+        user_id: The ID of the user whose history we want to retrieve
+        limit: The most entries to return (HISTORY_LIMIT by default)
+        offset: How many of the most recent entries to skip (0 = first page)
+    
+    Returns:
+        dict: Contains list of game history entries or error information
+    """
+    
+    # Borrow a connection from the async pool
+    async with get_async_conn() as connection:
         
-        # Fetch the result
-        user_info = cursor.fetchone()
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed", "history": []}
+        
+        try:
+            # DictCursor gives results as dictionaries, like dictionary=True
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                
+                # Get one page of game history for this user, most recent first (see _SQL_HISTORY)
+                await cursor.execute(_ASYNC_SQL_HISTORY, (user_id, limit, offset))
+                
+                # Fetch all results (played_at is already a formatted string)
+                history_list = await cursor.fetchall()
+            
+            # Return the history list (aiomysql gives a tuple, JSON needs a list)
+            return {"success": True, "history": list(history_list)}
+            
+        except aiomysql.Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error getting game history: %s", e)
+            # Return error message with empty history list
+            return {"success": False, "message": "Failed to retrieve history", "history": []}
+
+async def get_leaderboard_async(limit=LEADERBOARD_LIMIT, offset=0):
+    """
+    Async version of get_leaderboard (see there), used by the leaderboard
+    page. Shares the same cache, so only one of them reads the first page.
+    
+    Args:
+        limit: The most players to return (LEADERBOARD_LIMIT by default)
+        offset: How many of the best players to skip (0 = first page)
+    
+    Returns:
+        dict: Contains list of users with their rankings, the total number
+              of players, or error information
+    """
+    
+    # Serve the cached leaderboard if it is recent enough
+    cached = get_cached_leaderboard(limit, offset)
+    if cached is not None:
+        return cached
+    
+    # Borrow a connection from the async pool
+    async with get_async_conn() as connection:
         
-        # Close the cursor and connection to free up resources
-        cursor.close()
-        connection.close()
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed", "leaderboard": []}
+        
+        try:
+            # DictCursor gives results as dictionaries, like dictionary=True
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                
+                # Get one page of ranked players and the total number of players (see _SQL_LEADERBOARD)
+                await cursor.execute(_ASYNC_SQL_LEADERBOARD, (limit, offset))
+                
+                # Fetch all results
+                leaderboard_list = await cursor.fetchall()
+            
+            # Build (and cache) the result from the rows
+            return save_leaderboard(list(leaderboard_list), limit, offset)
+            
+        except aiomysql.Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error getting leaderboard: %s", e)
+            # Return error message with empty leaderboard list
+            return {"success": False, "message": "Failed to retrieve leaderboard", "leaderboard": []}
+
+async def get_user_info_async(user_id):
+    """
+    Async version of get_user_info (see there), used by the account page.
+    
+    Args:
+        user_id: The ID of the user whose info we want to retrieve
+    
+    Returns:
+        dict: Contains user info or error information
+    """
+    
+    # Borrow a connection from the async pool
+    async with get_async_conn() as connection:
         
-        # If user was found
-        if user_info is not None:
-            # Convert created_at datetime to string for JSON serialization
-            user_info["created_at"] = user_info["created_at"].strftime("%Y-%m-%d %H:%M")
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed"}
+        
+        try:
+            # DictCursor gives results as dictionaries, like dictionary=True
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                
+                # Get the user's basic information and stats (see _SQL_USER_INFO)
+                await cursor.execute(_ASYNC_SQL_USER_INFO, (user_id,))
+                
+                # Fetch the result
+                user_info = await cursor.fetchone()
+            
+            # User not found in database
+            if user_info is None:
+                return {"success": False, "message": "User not found"}
+            
+            # Add the win rate, calculated the same way as in get_user_stats
+            user_info["win_rate"] = calculate_win_rate(user_info["games_played"], user_info["games_won"])
             
             # Return the user info
             return {"success": True, "user": user_info}
-        else:
-            # User not found in database
-            return {"success": False, "message": "User not found"}
-        
-    except Error as e:
-        # If any database error occurs, print it for debugging
-        print(f"Error getting user info: {e}")
-        # Return error message
-        return {"success": False, "message": "Failed to retrieve user info"}
+            
+        except aiomysql.Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error getting user info: %s", e)
+            # Return error message
+            return {"success": False, "message": "Failed to retrieve user info"}
 
 # ============================================================================
 # UPDATE OPERATIONS
@@ -515,7 +1503,7 @@ def get_user_info(user_id):
 def update_username(user_id, new_username):
     """
     Updates the username for a specific user.
-    Checks if the new username is already taken before updating.
+    Fails if the new username is already taken by someone else.
     
     Args:
         user_id: The ID of the user who wants to change their username
@@ -525,56 +1513,46 @@ def update_username(user_id, new_username):
         dict: Contains 'success' (bool) and 'message' (str) keys
     """
     
-    # Get a connection to the database
-    connection = get_db_connection()
-    
-    # Check if the connection was successful
-    if connection is None:
-        # Return error if we cannot connect to the database
-        return {"success": False, "message": "Database connection failed"}
-    
-    try:
-        # Create a cursor object to execute SQL queries
-        cursor = connection.cursor()
-        
-        # First, check if the new username already exists (but not for this user)
-        check_query = "SELECT user_id FROM users WHERE username = %s AND user_id != %s"
-        
-        # Execute the query with new_username and user_id as parameters
-        cursor.execute(check_query, (new_username, user_id))
-        
-        # Fetch one result from the query
-        existing_user = cursor.fetchone()
-        
-        # If someone else already has this username
-        if existing_user is not None:
-            # Close the cursor and connection to free up resources
-            cursor.close()
-            connection.close()
-            # Return error message indicating username is taken
-            return {"success": False, "message": "Username already taken"}
+    # Borrow a connection from the pool
+    # The with-block hands it back to the pool when the function is done
+    with get_conn() as connection:
         
-        # If username is available, update the user's username
-        update_query = "UPDATE users SET username = %s WHERE user_id = %s"
-        
-        # Execute the update query
-        cursor.execute(update_query, (new_username, user_id))
-        
-        # Commit the transaction to save the changes
-        connection.commit()
-        
-        # Close the cursor and connection to free up resources
-        cursor.close()
-        connection.close()
-        
-        # Return success message
-        return {"success": True, "message": "Username updated successfully"}
-        
-    except Error as e:
-        # If any database error occurs, print it for debugging
-        print(f"Error updating username: {e}")
-        # Return error message
-        return {"success": False, "message": "Failed to update username"}
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed"}
+        
+        try:
+            # Open a cursor inside a transaction
+            # The changes are committed when the block finishes, or rolled back
+            # if any query fails, so a write is never only half saved
+            with transaction(connection) as cursor:
+                
+                # Update the user's username (see _SQL_UPDATE_USERNAME)
+                cursor.execute(_SQL_UPDATE_USERNAME, (new_username, user_id))
+            
+            # The new name is now saved, so the cached leaderboard is out of date
+            clear_leaderboard_cache()
+            
+            # Return success message
+            return {"success": True, "message": "Username updated successfully"}
+            
+        except IntegrityError as e:
+            # Someone else already has this username
+            if e.errno == errorcode.ER_DUP_ENTRY:
+                # Return error message indicating username is taken
+                return {"success": False, "message": "Username already taken"}
+            
+            # Any other broken rule is a real error
+            logger.error("Error updating username: %s", e)
+            # Return error message
+            return {"success": False, "message": "Failed to update username"}
+            
+        except Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error updating username: %s", e)
+            # Return error message
+            return {"success": False, "message": "Failed to update username"}
 
 def update_password(user_id, current_password, new_password):
     """
@@ -590,56 +1568,89 @@ def update_password(user_id, current_password, new_password):
         dict: Contains 'success' (bool) and 'message' (str) keys
     """
     
-    # Get a connection to the database
-    connection = get_db_connection()
+    # Borrow a connection from the pool only to read the stored hash
+    # The with-block hands it back before the slow password checks below
+    with get_conn() as connection:
+        
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed"}
+        
+        try:
+            # Create a cursor object to execute SQL queries
+            with connection.cursor() as cursor:
+                
+                # First, get the stored password hash to verify the current password
+                # (see _SQL_VERIFY_PASSWORD)
+                cursor.execute(_SQL_VERIFY_PASSWORD, (user_id,))
+                
+                # Fetch one result from the query
+                verified_user = cursor.fetchone()
+            
+        except Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error updating password: %s", e)
+            # Return error message
+            return {"success": False, "message": "Failed to update password"}
     
-    # Check if the connection was successful
-    if connection is None:
-        # Return error if we cannot connect to the database
-        return {"success": False, "message": "Database connection failed"}
+    # The user does not exist
+    if verified_user is None:
+        # Return error message
+        return {"success": False, "message": "Current password is incorrect"}
     
-    try:
-        # Create a cursor object to execute SQL queries
-        cursor = connection.cursor()
-        
-        # First, verify that the current password is correct
-        verify_query = "SELECT user_id FROM users WHERE user_id = %s AND password = %s"
-        
-        # Execute the query with user_id and current_password as parameters
-        cursor.execute(verify_query, (user_id, current_password))
-        
-        # Fetch one result from the query
-        verified_user = cursor.fetchone()
+    # verified_user[0] contains the stored password hash
+    stored_password = verified_user[0]
+    
+    # Check the current password in Python, like verify_user_login does
+    # A password that just logged in is found in the login cache, so
+    # the slow Argon2 check only runs when it is not
+    if not (is_cached_login(stored_password, current_password)
+            or check_password(stored_password, current_password)["matches"]):
+        # Return error message
+        return {"success": False, "message": "Current password is incorrect"}
+    
+    # Hash the new password before borrowing a connection again, so no
+    # pooled connection (and no row lock) is held while Argon2 is working
+    new_stored_password = hash_password(new_password)
+    
+    # Borrow a connection from the pool only for the UPDATE
+    with get_conn() as connection:
         
-        # If current password does not match
-        if verified_user is None:
-            # Close the cursor and connection to free up resources
-            cursor.close()
-            connection.close()
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed"}
+        
+        try:
+            # Open a cursor inside a transaction
+            # The changes are committed when the block finishes, or rolled back
+            # if any query fails, so a write is never only half saved
+            with transaction(connection) as cursor:
+                
+                # Update to the new password, if the hash we checked is still
+                # the saved one (see _SQL_UPDATE_PASSWORD)
+                cursor.execute(_SQL_UPDATE_PASSWORD, (new_stored_password, user_id, stored_password))
+                
+                # Check how many rows were affected
+                rows_affected = cursor.rowcount
+            
+        except Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error updating password: %s", e)
             # Return error message
-            return {"success": False, "message": "Current password is incorrect"}
-        
-        # If current password is correct, update to the new password
-        update_query = "UPDATE users SET password = %s WHERE user_id = %s"
-        
-        # Execute the update query
-        cursor.execute(update_query, (new_password, user_id))
-        
-        # Commit the transaction to save the changes
-        connection.commit()
-        
-        # Close the cursor and connection to free up resources
-        cursor.close()
-        connection.close()
-        
-        # Return success message
-        return {"success": True, "message": "Password updated successfully"}
-        
-    except Error as e:
-        # If any database error occurs, print it for debugging
-        print(f"Error updating password: {e}")
+            return {"success": False, "message": "Failed to update password"}
+    
+    # The password was changed by someone else after we checked it
+    if rows_affected == 0:
         # Return error message
-        return {"success": False, "message": "Failed to update password"}
+        return {"success": False, "message": "Current password is incorrect"}
+    
+    # Remember the new password so the next login can skip Argon2
+    remember_login(new_stored_password, new_password)
+    
+    # Return success message
+    return {"success": True, "message": "Password updated successfully"}
 
 # ============================================================================
 # DELETE OPERATIONS
@@ -659,54 +1670,47 @@ def delete_game_history_entry(history_id, user_id):
         dict: Contains 'success' (bool) and 'message' (str) keys
     """
     
-    # Get a connection to the database
-    connection = get_db_connection()
-    
-    # Check if the connection was successful
-    if connection is None:
-        # Return error if we cannot connect to the database
-        return {"success": False, "message": "Database connection failed"}
-    
-    try:
-        # Create a cursor object to execute SQL queries
-        cursor = connection.cursor()
-        
-        # Delete the history entry only if it belongs to this user
-        # This prevents users from deleting other users' history
-        delete_query = "DELETE FROM game_history WHERE history_id = %s AND user_id = %s"
-        
-        # Execute the delete query
-        cursor.execute(delete_query, (history_id, user_id))
-        
-        # Check how many rows were affected
-        # If 0 rows affected, either the entry doesn't exist or doesn't belong to this user
-        rows_affected = cursor.rowcount
+    # Borrow a connection from the pool
+    # The with-block hands it back to the pool when the function is done
+    with get_conn() as connection:
         
-        # Commit the transaction to save the changes
-        connection.commit()
-        
-        # Close the cursor and connection to free up resources
-        cursor.close()
-        connection.close()
-        
-        # Check if a row was actually deleted
-        if rows_affected > 0:
-            # Return success message
-            return {"success": True, "message": "History entry deleted successfully"}
-        else:
-            # No rows were deleted
-            return {"success": False, "message": "History entry not found"}
-        
-    except Error as e:
-        # If any database error occurs, print it for debugging
-        print(f"Error deleting history entry: {e}")
-        # Return error message
-        return {"success": False, "message": "Failed to delete history entry"}
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed"}
+        
+        try:
+            # Open a cursor inside a transaction
+            # The changes are committed when the block finishes, or rolled back
+            # if any query fails, so a write is never only half saved
+            with transaction(connection) as cursor:
+                
+                # Delete the history entry only if it belongs to this user
+                # (see _SQL_DELETE_HISTORY_ENTRY)
+                cursor.execute(_SQL_DELETE_HISTORY_ENTRY, (history_id, user_id))
+                
+                # Check how many rows were affected
+                # If 0 rows affected, either the entry doesn't exist or doesn't belong to this user
+                rows_affected = cursor.rowcount
+                
+                # Check if a row was actually deleted
+                if rows_affected > 0:
+                    # Return success message
+                    return {"success": True, "message": "History entry deleted successfully"}
+                else:
+                    # No rows were deleted
+                    return {"success": False, "message": "History entry not found"}
+            
+        except Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error deleting history entry: %s", e)
+            # Return error message
+            return {"success": False, "message": "Failed to delete history entry"}
 
 def delete_user_account(user_id):
     """
     Deletes a user account and all associated data.
-    The game_history entries are automatically deleted due to CASCADE.
+    The game_history entries are deleted first in the same transaction.
     
     Args:
         user_id: The ID of the user account to delete
@@ -715,46 +1719,42 @@ def delete_user_account(user_id):
         dict: Contains 'success' (bool) and 'message' (str) keys
     """
     
-    # Get a connection to the database
-    connection = get_db_connection()
-    
-    # Check if the connection was successful
-    if connection is None:
-        # Return error if we cannot connect to the database
-        return {"success": False, "message": "Database connection failed"}
-    
-    try:
-        # Create a cursor object to execute SQL queries
-        cursor = connection.cursor()
-        
-        # Delete the user from the users table
-        # Due to ON DELETE CASCADE in the foreign key, all game_history entries
-        # for this user will also be automatically deleted
-        delete_query = "DELETE FROM users WHERE user_id = %s"
-        
-        # Execute the delete query
-        cursor.execute(delete_query, (user_id,))
-        
-        # Check how many rows were affected
-        rows_affected = cursor.rowcount
-        
-        # Commit the transaction to save the changes
-        connection.commit()
+    # Borrow a connection from the pool
+    # The with-block hands it back to the pool when the function is done
+    with get_conn() as connection:
         
-        # Close the cursor and connection to free up resources
-        cursor.close()
-        connection.close()
-        
-        # Check if the user was actually deleted
-        if rows_affected > 0:
+        # Check if the connection was successful
+        if connection is None:
+            # Return error if we cannot connect to the database
+            return {"success": False, "message": "Database connection failed"}
+        
+        try:
+            # Open a cursor inside a transaction
+            # The changes are committed when the block finishes, or rolled back
+            # if any query fails, so a write is never only half saved
+            with transaction(connection) as cursor:
+                
+                # Delete the user's game history, then the user (see _SQL_DELETE_USER)
+                # Execute both statements in a single round trip
+                # multi=True gives back one result per statement; the last one
+                # is the users DELETE, so its rowcount tells us if the user existed
+                for statement_result in cursor.execute(_SQL_DELETE_USER, (user_id, user_id), multi=True):
+                    # Check how many rows were affected
+                    rows_affected = statement_result.rowcount
+                
+                # Check if the user was actually deleted
+                if rows_affected == 0:
+                    # No user was deleted (user might not exist)
+                    return {"success": False, "message": "Account not found"}
+            
+            # The user is now gone, so the cached leaderboard is out of date
+            clear_leaderboard_cache()
+            
             # Return success message
             return {"success": True, "message": "Account deleted successfully"}
-        else:
-            # No user was deleted (user might not exist)
-            return {"success": False, "message": "Account not found"}
         
-    except Error as e:
-        # If any database error occurs, print it for debugging
-        print(f"Error deleting user account: {e}")
-        # Return error message
-        return {"success": False, "message": "Failed to delete account"}
\ No newline at end of file
+        except Error as e:
+            # If any database error occurs, log it for debugging
+            logger.error("Error deleting user account: %s", e)
+            # Return error message
+            return {"success": False, "message": "Failed to delete account"}
\ No newline at end of file
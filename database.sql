@@ -34,11 +34,13 @@ CREATE TABLE IF NOT EXISTS users (
     -- NOT NULL: This field cannot be left empty
     username VARCHAR(50) UNIQUE NOT NULL,
     
-    -- password: The user's password stored as plain text
-    -- VARCHAR(50): Can store up to 50 characters
+    -- password: The user's password stored as an Argon2 hash
+    -- VARCHAR(255): Room for the hash (about 100 characters) plus its settings
     -- NOT NULL: This field cannot be left empty
-    -- Note: Plain text storage is only for this school project, not for production
-    password VARCHAR(50) NOT NULL,
+    -- Note: Existing databases can be upgraded with:
+    --   ALTER TABLE users MODIFY password VARCHAR(255) NOT NULL;
+    --   Old plain text passwords are replaced by hashes the next time each user logs in
+    password VARCHAR(255) NOT NULL,
     
     -- games_played: Counter for total number of games the user has played
     -- INT: Stores whole numbers
@@ -105,13 +107,15 @@ CREATE TABLE IF NOT EXISTS game_history (
 -- STEP 4: Create indexes for better query performance
 -- ============================================
 
--- Index on user_id in game_history table
--- This speeds up queries that fetch all games for a specific user
-CREATE INDEX idx_game_history_user_id ON game_history(user_id);
-
--- Index on played_at in game_history table
--- This speeds up queries that sort games by date (most recent first)
-CREATE INDEX idx_game_history_played_at ON game_history(played_at);
+-- Index on user_id and played_at together in game_history table
+-- It keeps each user's games sorted by date (most recent first), so the
+-- history page can read one page of games without sorting them all
+-- It also serves queries that only filter by user_id (and the foreign key)
+-- Note: Existing databases can be upgraded with:
+--   CREATE INDEX idx_history_user_played ON game_history(user_id, played_at DESC);
+--   DROP INDEX idx_game_history_user_id ON game_history;
+--   DROP INDEX idx_game_history_played_at ON game_history;
+CREATE INDEX idx_history_user_played ON game_history(user_id, played_at DESC);
 
 -- ============================================
 -- STEP 5: Verification queries (optional)
@@ -2,13 +2,37 @@
 # mcq_generator.py
 # This file handles the generation of MCQ questions using Google's Gemini API
 # It generates questions at three difficulty levels: Easy, Medium, and Hard
+# The generator is async so the web app can await it without blocking
 # ============================================================================
 
 # Import os module to access environment variables (like API keys)
 import os
 
-# Import json module to parse JSON responses from the AI
-import json
+# Import logging to report progress and errors without writing to the
+# terminal on every quiz (print() would)
+import logging
+
+# Import asyncio to run the async quiz generator from normal (sync) code
+import asyncio
+
+# Import orjson, a fast JSON library (written in Rust), to read and write
+# the saved answers in the LLM cache
+import orjson
+
+# Import msgspec to read the AI's answers and check every question's fields
+import msgspec
+
+# Import random to pick one of the cached quizzes for a topic
+import random
+
+# Import time to know when a cached quiz is too old to reuse
+import time
+
+# Import sqlite3 to save Gemini's answers in a small database file
+import sqlite3
+
+# Import closing to make sure each SQLite connection is closed again
+from contextlib import closing
 
 # Import load_dotenv to load environment variables from a .env file
 from dotenv import load_dotenv
@@ -19,8 +43,41 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 # Import PromptTemplate to create structured prompts for the AI
 from langchain_core.prompts import PromptTemplate
 
-# Import StrOutputParser to convert AI responses to strings
-from langchain_core.output_parsers import StrOutputParser
+# Import ConfigurableField to change a model setting for a single request
+from langchain_core.runnables import ConfigurableField
+
+# Import InMemoryRateLimiter to keep the number of Gemini requests per
+# minute under the API's limit
+from langchain_core.rate_limiters import InMemoryRateLimiter
+
+# Import the output parsers that turn the AI's answer into Python values
+# JsonOutputParser: parses the JSON answer (see QuestionSetOutputParser)
+# StrOutputParser: keeps the answer as text (used when streaming it)
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+
+# Import the error JsonOutputParser raises when the answer is not valid JSON
+from langchain_core.exceptions import OutputParserException
+
+# Import tenacity to ask Gemini again when an answer is not valid JSON
+# AsyncRetrying: a retry loop usable with "async for"
+# stop_after_attempt / wait_exponential: how often to try and how long to wait
+# retry_if_exception_type: which errors are worth another try
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+# Import the pieces needed to plug our own cache into LangChain
+# BaseCache: the interface every LangChain LLM cache follows
+# set_llm_cache: makes a cache the one every model uses
+# ChatGeneration and AIMessage: how a chat model's answer is stored
+from langchain_core.caches import BaseCache
+from langchain_core.globals import set_llm_cache
+from langchain_core.outputs import ChatGeneration
+from langchain_core.messages import AIMessage
+
+# Logger for this file (named "mcq_generator")
+# Progress messages use INFO and raw AI answers use DEBUG, so they are
+# skipped without any output at the default WARNING level in production
+# Warnings and errors still reach stderr (Python's last resort handler)
+logger = logging.getLogger(__name__)
 
 # Load environment variables from the .env file
 # This allows us to keep sensitive data like API keys out of our code
@@ -30,167 +87,722 @@ load_dotenv()
 # This key is required to authenticate with the Gemini API
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
+# Where Gemini's answers are saved (see LLM RESPONSE CACHE below)
+# By default a file next to this one; set MCQ_CACHE_PATH in .env to move it
+MCQ_CACHE_PATH = os.getenv(
+    "MCQ_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".mcq_cache.db")
+)
+
+# How many requests per minute this process may send to Gemini
+# Set GEMINI_REQUESTS_PER_MINUTE in .env to match your API plan
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "360"))
+
 # ============================================================================
-# INITIALIZE THE AI MODEL
+# LLM RESPONSE CACHE (skip Gemini for prompts it has already answered)
 # ============================================================================
 
+class SQLiteQuizCache(BaseCache):
+    """
+    LangChain cache that saves Gemini's answers in a SQLite file.
+    An identical prompt (same topic, number, difficulty and quiz version)
+    sent to the same model is answered from the file in a few milliseconds
+    instead of waiting seconds for Gemini.
+    The file is shared by every worker process and kept across restarts,
+    which the in-memory quiz cache below cannot do.
+    Delete the file to start over with fresh questions.
+    """
+    
+    def __init__(self, path):
+        """
+        Creates the cache table in the SQLite file if it does not exist yet.
+        
+        Args:
+            path: Where the SQLite file is (it is created if missing)
+        """
+        
+        # Remember the file so every call can open its own connection
+        # (the async LangChain methods run these calls on worker threads,
+        # and a SQLite connection may only be used by the thread that opened it)
+        self.path = path
+        
+        # Create the table: one row per prompt and model settings
+        # "with connection" commits the change
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "prompt TEXT, llm_string TEXT, response TEXT, "
+                "PRIMARY KEY (prompt, llm_string))"
+            )
+    
+    def lookup(self, prompt, llm_string):
+        """
+        Looks up a saved answer.
+        
+        Args:
+            prompt: The exact prompt text sent to the model
+            llm_string: A description of the model and its settings
+        
+        Returns:
+            list: The saved answer as LangChain generations, or None if missing
+        """
+        
+        # Find the row for this prompt and model
+        with closing(sqlite3.connect(self.path)) as connection:
+            row = connection.execute(
+                "SELECT response FROM llm_cache WHERE prompt = ? AND llm_string = ?",
+                (prompt, llm_string)
+            ).fetchone()
+        
+        # Nothing saved for this prompt yet
+        if row is None:
+            return None
+        
+        # Rebuild the chat model's answer from the saved text
+        return [ChatGeneration(message=AIMessage(content=text)) for text in orjson.loads(row[0])]
+    
+    def update(self, prompt, llm_string, return_val):
+        """
+        Saves a new answer from the model.
+        Only answers that are valid questions (see Question) with a count
+        and difficulty split we can use (see has_usable_split) are saved, so
+        a broken or short answer is asked for again next time instead of
+        being repeated forever.
+        
+        Args:
+            prompt: The exact prompt text sent to the model
+            llm_string: A description of the model and its settings
+            return_val: The model's answer as LangChain generations
+        """
+        
+        # The text of each generation (there is one per call)
+        # str() because LangChain's text is a subclass of str, which orjson
+        # and msgspec do not accept
+        texts = [str(generation.text) for generation in return_val]
+        
+        # Skip answers we would not be able to use
+        try:
+            for text in texts:
+                if not has_usable_split(question_set_decoder.decode(text)):
+                    return
+        except msgspec.DecodeError:
+            return
+        
+        # Save (or replace) the answer for this prompt and model
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO llm_cache (prompt, llm_string, response) VALUES (?, ?, ?)",
+                (prompt, llm_string, orjson.dumps(texts).decode())
+            )
+    
+    def clear(self, **kwargs):
+        """
+        Removes every saved answer.
+        """
+        
+        # Delete all rows ("with connection" commits the change)
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.execute("DELETE FROM llm_cache")
+
+# Make every LangChain model in this app use the SQLite cache
+# ChatGoogleGenerativeAI checks it before each call and fills it after
+set_llm_cache(SQLiteQuizCache(MCQ_CACHE_PATH))
+
+# ============================================================================
+# INITIALIZE THE AI MODELS
+# ============================================================================
+
+# We use two Gemini models:
+# - llm_strong (gemini-2.5-flash) for HARD questions and the one-request quiz
+# - llm_fast (gemini-2.5-flash-lite) for EASY and MEDIUM questions, which
+#   don't need the bigger model and come back about twice as fast
+
+# How many output tokens to allow per question, plus some room for the
+# braces around the JSON answer
+# Gemini reserves room for the whole limit and the answer takes longer the
+# more it writes, so each request gets a limit sized to its questions
+# instead of one flat 2000
+TOKENS_PER_QUESTION = 180
+EXTRA_OUTPUT_TOKENS = 100
+
+def output_token_limit(number):
+    """
+    Works out the max_output_tokens for a request.
+    
+    Args:
+        number: How many questions the request asks for
+    
+    Returns:
+        int: The output token limit (1000 for 5 questions, 1900 for 10)
+    """
+    
+    # A fixed share per question, plus the extra room
+    return number * TOKENS_PER_QUESTION + EXTRA_OUTPUT_TOKENS
+
+# Both models share one rate limiter, so a big batch of quizzes waits its
+# turn instead of getting "429 Too Many Requests" errors from Gemini
+# max_bucket_size: how many requests may start at once after a quiet period
+gemini_rate_limiter = InMemoryRateLimiter(
+    requests_per_second=GEMINI_REQUESTS_PER_MINUTE / 60,
+    check_every_n_seconds=0.1,
+    max_bucket_size=10
+)
+
 # Create an instance of the Gemini AI model with specific settings
 # api_key: The authentication key for the Gemini API
-# model: The specific Gemini model to use (gemini-2.0-flash is fast and capable)
+# model: The specific Gemini model to use (gemini-2.5-flash is fast and capable)
 # temperature: Controls randomness (0.3 = more focused, less random)
-# max_output_tokens: Maximum length of the AI's response
-llm = ChatGoogleGenerativeAI(
+# max_output_tokens: Maximum length of the AI's response (the default;
+#                    each request sets its own with output_token_limit)
+# response_mime_type: Gemini's JSON mode, the answer is always plain JSON
+#                     (never wrapped in markdown code blocks)
+# rate_limiter: waits before a request if too many were sent recently
+# thinking_budget: 0 turns off the "thinking" step of 2.5 models. Thinking
+#                  tokens count towards max_output_tokens, so with it on a
+#                  tight limit could cut the JSON answer short
+# configurable_fields: lets a request change max_output_tokens with
+#                      with_config(configurable={"max_output_tokens": ...})
+llm_strong = ChatGoogleGenerativeAI(
     api_key=GOOGLE_API_KEY,      # API key for authentication
     model="gemini-2.5-flash",     # The Gemini model version to use
     temperature=0.3,             # Low temperature for more consistent outputs
-    max_output_tokens=2000       # Allow longer responses for multiple questions
-)
+    max_output_tokens=2000,      # Allow longer responses for multiple questions
+    response_mime_type="application/json",  # Only answer with JSON
+    thinking_budget=0,           # Answer right away, without thinking tokens
+    rate_limiter=gemini_rate_limiter  # Stay under the requests-per-minute limit
+).configurable_fields(max_output_tokens=ConfigurableField(id="max_output_tokens"))
+
+# The smaller, faster model, with the same settings
+llm_fast = ChatGoogleGenerativeAI(
+    api_key=GOOGLE_API_KEY,      # API key for authentication
+    model="gemini-2.5-flash-lite",  # The smaller Gemini model
+    temperature=0.3,             # Low temperature for more consistent outputs
+    max_output_tokens=2000,      # Allow longer responses for multiple questions
+    response_mime_type="application/json",  # Only answer with JSON
+    thinking_budget=0,           # Answer right away, without thinking tokens
+    rate_limiter=gemini_rate_limiter  # Stay under the requests-per-minute limit
+).configurable_fields(max_output_tokens=ConfigurableField(id="max_output_tokens"))
+
+# ============================================================================
+# ANSWER SCHEMA AND OUTPUT PARSER
+# ============================================================================
+
+class Question(msgspec.Struct):
+    """
+    One question as the AI writes it in its JSON answer.
+    msgspec checks every field while reading the JSON (in C), the same way
+    schemas.py checks the JSON sent to the API routes.
+    """
+    
+    # The question text
+    question: str
+    
+    # The four options, keyed "a", "b", "c" and "d"
+    options: dict[str, str]
+    
+    # The letter of the correct option
+    correct: str
+    
+    # EASY, MEDIUM or HARD (only the one-request quiz has to fill this in)
+    difficulty: str = ""
+    
+    def __post_init__(self):
+        # Clean up the answer letter: " A" or "a)" still mean "a"
+        self.correct = self.correct.strip().lower()[:1]
+        
+        # Write the difficulty the same way as the TIERS table
+        self.difficulty = self.difficulty.strip().upper()
+        
+        # Every question needs exactly the options a, b, c and d
+        if sorted(self.options) != ["a", "b", "c", "d"]:
+            raise ValueError("options must be exactly a, b, c and d")
+        
+        # The correct answer has to be one of them
+        if self.correct not in self.options:
+            raise ValueError("correct must be one of a, b, c or d")
+
+# Decoders are set up once and reused for every answer
+# question_set_decoder reads a whole answer: {"1": {...}, "2": {...}, ...}
+# question_decoder reads a single question (used while streaming)
+question_set_decoder = msgspec.json.Decoder(dict[str, Question])
+question_decoder = msgspec.json.Decoder(Question)
+
+def has_usable_split(questions_dict):
+    """
+    Checks that an answer has a number of questions that one of our prompts
+    asks for: the whole quiz with its 5/3/2 difficulty split (see
+    build_batch_questions), or all the questions of one level (see
+    generate_questions_by_difficulty).
+    
+    Args:
+        questions_dict: The decoded answer, e.g. {"1": Question, ...}
+    
+    Returns:
+        bool: True if the answer could be used as it is
+    """
+    
+    # How many questions of each difficulty a quiz has
+    tiers = dict(TIERS)
+    
+    # An answer with a whole quiz's worth of questions must have the split
+    if len(questions_dict) == sum(tiers.values()):
+        # Count the questions of each difficulty in the answer
+        counts = {}
+        for question in questions_dict.values():
+            counts[question.difficulty] = counts.get(question.difficulty, 0) + 1
+        return counts == tiers
+    
+    # Otherwise it answers a prompt for one level. The level comes from the
+    # prompt (see append_tier), and the AI may leave "difficulty" out, so
+    # only the number of questions is checked
+    return len(questions_dict) in tiers.values()
+
+class QuestionSetOutputParser(JsonOutputParser):
+    """
+    Output parser that reads and checks the AI's answer in one step.
+    The answer becomes a dictionary of Question objects. A missing field, a
+    wrong type or a bad answer letter raises OutputParserException, just
+    like invalid JSON, so invoke_with_feedback asks Gemini again and tells
+    it what was wrong.
+    """
+    
+    def parse_result(self, result, *, partial=False):
+        """
+        Parses the model's answer into Question objects.
+        
+        Args:
+            result: The model's answer as LangChain generations
+            partial: Whether the answer may be incomplete (not used here)
+        
+        Returns:
+            dict: The questions keyed "1", "2", ... in the order the AI wrote them
+        """
+        
+        # str() because LangChain's text is a subclass of str, which the
+        # decoders do not accept
+        text = str(result[0].text)
+        
+        try:
+            # The fast path: plain JSON (JSON mode), read and checked at once
+            return question_set_decoder.decode(text)
+            
+        except msgspec.ValidationError as e:
+            # Valid JSON, but not shaped like our questions
+            raise OutputParserException(f"Invalid questions: {e}", llm_output=text) from e
+            
+        except msgspec.DecodeError:
+            # Not plain JSON (for example wrapped in markdown): let LangChain's
+            # parser read it (it raises OutputParserException if it can't),
+            # then check the result the same way
+            data = super().parse_result(result, partial=partial)
+            try:
+                return msgspec.convert(data, dict[str, Question])
+            except msgspec.ValidationError as e:
+                raise OutputParserException(f"Invalid questions: {e}", llm_output=text) from e
 
 # ============================================================================
 # PROMPT TEMPLATE FOR GENERATING QUESTIONS
 # ============================================================================
 
 # This template tells the AI exactly how to format the questions
-# We use placeholders {topic}, {number}, and {difficulty} that will be filled in
+# It is kept short on purpose: Gemini reads the whole prompt before it starts
+# answering, so every line here adds time (and cost) to every request
+# JSON mode (response_mime_type above) already makes the answer plain JSON,
+# so one line showing the shape is enough instead of a full example
+# We use placeholders {topic}, {number}, {difficulty}, and {variant} that will be filled in
+# {feedback} is empty, except when Gemini is asked again after an invalid
+# answer (see invoke_with_feedback)
+# {variant} is the quiz version (1, 2, 3, ...). The LLM cache saves one
+# answer per exact prompt, so without it every quiz for a topic would be
+# the same cached quiz
 MCQ_GENERATION_TEMPLATE = """
-You are an expert quiz creator. Generate exactly {number} multiple choice questions about the topic: {topic}
-
-Difficulty Level: {difficulty}
-- EASY: Basic knowledge questions that most people familiar with the topic would know
-- MEDIUM: Intermediate questions requiring deeper understanding
-- HARD: Challenging questions that require expert-level knowledge
-
-STRICT REQUIREMENTS:
-1. Generate EXACTLY {number} questions, no more, no less
-2. Each question must have exactly 4 options labeled a, b, c, d
-3. Only ONE option should be correct
-4. Output ONLY valid JSON, no additional text or explanation
-5. Do not include markdown code blocks or any formatting
-
-OUTPUT FORMAT (follow this exactly):
-{{
-    "1": {{
-        "question": "The question text goes here?",
-        "options": {{
-            "a": "First option",
-            "b": "Second option",
-            "c": "Third option",
-            "d": "Fourth option"
-        }},
-        "correct": "a",
-        "difficulty": "{difficulty}"
-    }},
-    "2": {{
-        "question": "Second question text?",
-        "options": {{
-            "a": "First option",
-            "b": "Second option",
-            "c": "Third option",
-            "d": "Fourth option"
-        }},
-        "correct": "b",
-        "difficulty": "{difficulty}"
-    }}
-}}
-
-Generate the questions now:
-"""
+Write exactly {number} {difficulty} multiple choice questions about: {topic}
+Quiz version: {variant} (each version should ask different questions)
+EASY = basic knowledge, MEDIUM = deeper understanding, HARD = expert-level.
+Each question has options a, b, c, d and exactly one correct answer.
+Return only JSON shaped like:
+{{"1": {{"question": "...", "options": {{"a": "...", "b": "...", "c": "...", "d": "..."}}, "correct": "a", "difficulty": "{difficulty}"}}, "2": ...}}
+{feedback}"""
 
 # Create a PromptTemplate object from our template string
 # input_variables: The placeholders that will be filled in when we use the template
+# partial_variables: placeholders with a default value (no feedback at first)
 mcq_prompt = PromptTemplate(
-    input_variables=["topic", "number", "difficulty"],  # Variables to fill in
+    input_variables=["topic", "number", "difficulty", "variant"],  # Variables to fill in
+    partial_variables={"feedback": ""},                  # No feedback by default
     template=MCQ_GENERATION_TEMPLATE                     # The template text
 )
 
-# Create a chain that connects the prompt, AI model, and output parser
-# The | operator chains them together: prompt -> AI -> parse output as string
-mcq_chain = mcq_prompt | llm | StrOutputParser()
+# Create the chains that connect the prompt, AI model, and output parser
+# The | operator chains them together: prompt -> AI -> parse output as JSON
+# One chain per model; generate_questions_by_difficulty picks between them
+mcq_chain_fast = mcq_prompt | llm_fast | QuestionSetOutputParser()
+mcq_chain_strong = mcq_prompt | llm_strong | QuestionSetOutputParser()
+
+# ============================================================================
+# PROMPT TEMPLATE FOR GENERATING THE WHOLE QUIZ IN ONE REQUEST
+# ============================================================================
+
+# How many questions of each difficulty a quiz has, in the order they are asked
+TIERS = (("EASY", 5), ("MEDIUM", 3), ("HARD", 2))
+
+# This template asks for all 10 questions at once, so a quiz needs one
+# request to Gemini instead of one per difficulty level
+# Every question carries its own "difficulty" so we can check the 5/3/2 split
+MCQ_BATCH_TEMPLATE = """
+Write exactly 10 multiple choice questions about: {topic}
+Quiz version: {variant} (each version should ask different questions)
+Questions 1-5 are EASY (basic knowledge), 6-8 MEDIUM (deeper understanding), 9-10 HARD (expert-level).
+Each question has options a, b, c, d and exactly one correct answer.
+Return only JSON shaped like:
+{{"1": {{"question": "...", "options": {{"a": "...", "b": "...", "c": "...", "d": "..."}}, "correct": "a", "difficulty": "EASY"}}, "2": ...}}
+{feedback}"""
+
+# Create a PromptTemplate object from the batch template string
+mcq_batch_prompt = PromptTemplate(
+    input_variables=["topic", "variant"],  # Variables to fill in
+    partial_variables={"feedback": ""},    # No feedback by default
+    template=MCQ_BATCH_TEMPLATE            # The template text
+)
+
+# The model settings for the one-request quiz
+# The output limit is set to fit 10 questions through the same
+# configurable field generate_questions_by_difficulty uses, so both paths
+# change the model setting (and the cache key) the same way
+batch_llm = llm_strong.with_config(
+    configurable={"max_output_tokens": output_token_limit(10)}
+)
+
+# The same kind of chain as mcq_chain_strong, but for the one-request quiz
+mcq_batch_chain = mcq_batch_prompt | batch_llm | QuestionSetOutputParser()
+
+# The same request as mcq_batch_chain, but keeping the answer as text so
+# QuestionStreamParser can read it while it streams in
+mcq_batch_stream_chain = mcq_batch_prompt | batch_llm | StrOutputParser()
 
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
-def clean_json_response(response_text):
+class QuestionStreamParser:
     """
-    Cleans the AI response to extract valid JSON.
-    Sometimes the AI includes markdown code blocks or extra text.
+    Reads the quiz JSON a piece at a time while Gemini is still writing it.
+    Each question is handed back as soon as its closing brace arrives,
+    instead of waiting for the whole answer to finish.
+    
+    The quiz looks like {"1": {...}, "2": {...}, ...}, so every object one
+    level inside the outer braces is a complete question.
+    """
+    
+    def __init__(self):
+        # Text that has arrived but is not part of a finished question yet
+        self.buffer = ""
+        
+        # How many braces deep we are (1 = inside the outer object)
+        self.depth = 0
+        
+        # Whether we are inside a JSON string, where braces don't count
+        self.in_string = False
+        
+        # Whether the previous character was a backslash inside a string
+        self.escaped = False
+        
+        # Where the question being read starts in the buffer (None if none)
+        self.question_start = None
+    
+    def feed(self, chunk):
+        """
+        Adds the next piece of the response and returns the questions it finished.
+        
+        Args:
+            chunk: The next piece of text streamed from the AI
+        
+        Returns:
+            list: The Question objects completed by this chunk, in order
+                  (raises msgspec.DecodeError if a question is not valid JSON,
+                  or msgspec.ValidationError if it is missing a field)
+        """
+        
+        # Only the new text needs to be scanned
+        scan_from = len(self.buffer)
+        self.buffer += chunk
+        
+        # Questions finished by this chunk
+        finished = []
+        
+        # Look at each new character once
+        for index in range(scan_from, len(self.buffer)):
+            char = self.buffer[index]
+            
+            # Inside a string only a closing quote matters
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            
+            # A quote starts a string (a key or a value)
+            elif char == '"':
+                self.in_string = True
+            
+            # An opening brace; at depth 2 a new question starts here
+            elif char == "{":
+                self.depth += 1
+                if self.depth == 2:
+                    self.question_start = index
+            
+            # A closing brace; leaving depth 2 means a question is complete
+            elif char == "}":
+                if self.depth == 2:
+                    question_text = self.buffer[self.question_start:index + 1]
+                    finished.append(question_decoder.decode(question_text))
+                    self.question_start = None
+                self.depth -= 1
+        
+        # Forget the text we no longer need, keeping an unfinished question
+        if self.question_start is None:
+            self.buffer = ""
+        else:
+            self.buffer = self.buffer[self.question_start:]
+            self.question_start = 0
+        
+        # Return the questions completed by this chunk
+        return finished
+
+# How many times a prompt is sent before giving up on invalid answers
+# (invalid JSON, or JSON that is not shaped like our questions)
+# Rate limits and server errors are not counted here: the Gemini client
+# already retries those by itself (see max_retries in langchain-google-genai)
+MAX_ATTEMPTS = 3
+
+async def invoke_with_feedback(chain, inputs):
+    """
+    Runs a quiz chain, asking Gemini again if the answer is not usable.
+    Each new try tells Gemini what was wrong with its previous answer,
+    and waits a little longer than the one before (1s, 2s, ... up to 8s).
     
     Args:
-        response_text: The raw text response from the AI
+        chain: A chain ending in QuestionSetOutputParser (like mcq_batch_chain)
+        inputs: The values for the prompt placeholders (without feedback)
     
     Returns:
-        str: Cleaned text that should be valid JSON
+        dict: The parsed answer
+        (raises OutputParserException if every try was invalid)
     """
     
-    # Remove markdown code block markers if present
-    # The AI sometimes wraps JSON in ```json ... ``` blocks
-    cleaned = response_text.replace("```json", "")  # Remove opening json marker
-    cleaned = cleaned.replace("```", "")             # Remove closing marker
-    
-    # Remove any leading or trailing whitespace
-    cleaned = cleaned.strip()
+    # No feedback for the first try, so the prompt matches the cached one
+    feedback = ""
     
-    # Return the cleaned JSON string
-    return cleaned
+    # tenacity runs the body again after an OutputParserException, until it
+    # works or MAX_ATTEMPTS is reached (reraise=True raises the last error)
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        wait=wait_exponential(min=1, max=8),
+        retry=retry_if_exception_type(OutputParserException),
+        reraise=True
+    ):
+        with attempt:
+            try:
+                # Send the prompt (with feedback if this is a retry)
+                return await chain.ainvoke({**inputs, "feedback": feedback})
+            except OutputParserException as e:
+                # Tell Gemini about the error in its answer for the next try
+                # (e.__cause__ is the JSON or msgspec error saying where it is)
+                logger.warning("Invalid answer from Gemini (try %d): %s", attempt.retry_state.attempt_number, e.__cause__ or e)
+                feedback = (
+                    f"Your previous answer had an error: {e.__cause__ or e}. "
+                    "Return only valid JSON in the shape shown above.\n"
+                )
+                raise
 
-def generate_questions_by_difficulty(topic, number, difficulty):
+async def generate_questions_by_difficulty(topic, number, difficulty, variant=1):
     """
     Generates a specific number of questions at a given difficulty level.
+    This is a coroutine: while it waits for Gemini to answer, the event loop
+    is free to serve other users.
     
     Args:
         topic: The subject/topic for the questions
         number: How many questions to generate
         difficulty: The difficulty level (EASY, MEDIUM, or HARD)
+        variant: Which version of the quiz this is (see MCQ_GENERATION_TEMPLATE)
     
     Returns:
         dict: A dictionary of questions, or None if generation failed
     """
     
+    # HARD questions need the bigger model, the others use the faster one
+    mcq_chain = mcq_chain_strong if difficulty == "HARD" else mcq_chain_fast
+    
+    # Limit the answer to what this many questions need
+    mcq_chain = mcq_chain.with_config(
+        configurable={"max_output_tokens": output_token_limit(number)}
+    )
+    
     try:
         # Invoke the AI chain with our parameters
-        # This sends the prompt to Gemini and gets the response
-        raw_response = mcq_chain.invoke({
+        # This sends the prompt to Gemini and awaits the response without
+        # blocking the thread (ainvoke is the async version of invoke)
+        # The chain's QuestionSetOutputParser hands back checked Question objects
+        # invoke_with_feedback asks again if the answer is not usable
+        questions_dict = await invoke_with_feedback(mcq_chain, {
             "topic": topic,           # The quiz topic
             "number": number,         # Number of questions to generate
-            "difficulty": difficulty  # Difficulty level
+            "difficulty": difficulty, # Difficulty level
+            "variant": variant        # Quiz version
         })
         
-        # Clean the response to get valid JSON
-        cleaned_response = clean_json_response(raw_response)
-        
-        # Parse the JSON string into a Python dictionary
-        questions_dict = json.loads(cleaned_response)
-        
         # Return the dictionary of questions
         return questions_dict
         
-    except json.JSONDecodeError as e:
-        # If JSON parsing fails, print error for debugging
-        print(f"JSON parsing error for {difficulty} questions: {e}")
-        print(f"Raw response was: {raw_response}")
+    except OutputParserException as e:
+        # If JSON parsing fails, log the error (and the raw answer at DEBUG level)
+        logger.error("JSON parsing error for %s questions: %s", difficulty, e)
+        logger.debug("Raw response was: %s", e.llm_output)
+        # Return None to indicate failure
+        return None
+        
+    except Exception as e:
+        # Catch any other errors (API errors, network issues, etc.)
+        logger.error("Error generating %s questions: %s", difficulty, e)
+        # Return None to indicate failure
+        return None
+
+def append_tier(all_questions, questions, difficulty):
+    """
+    Adds the questions of one difficulty level to the quiz.
+    The questions are taken in the order the AI wrote them: its keys
+    "1", "2", ... come in order and dictionaries keep that order, so there
+    is no need to sort them.
+    
+    Args:
+        all_questions: The quiz's list of question objects (added to in place)
+        questions: The Question objects from the AI, e.g. questions_dict.values()
+        difficulty: The difficulty level of these questions
+    """
+    
+    # Turn each question into a standardized question object
+    for question in questions:
+        all_questions.append({
+            "question_number": len(all_questions) + 1,  # Sequential number (1-10)
+            "question": question.question,               # The question text
+            "options": question.options,                 # The four options
+            "correct": question.correct,                 # The correct answer letter
+            "difficulty": difficulty                     # Difficulty level
+        })
+
+def build_batch_questions(questions_dict):
+    """
+    Turns the answer to the one-request quiz prompt into question objects.
+    The questions come back in quiz order: the EASY ones first, then MEDIUM,
+    then HARD.
+    
+    Args:
+        questions_dict: The parsed answer to MCQ_BATCH_TEMPLATE
+    
+    Returns:
+        list: The 10 question objects, or None if the answer was not shaped
+              like a quiz or did not have the 5/3/2 difficulty split
+    """
+    
+    try:
+        # Group the questions by the difficulty the AI gave each of them
+        # The AI usually keeps the requested order, but grouping makes sure
+        # the quiz always goes from easy to hard
+        by_difficulty = {difficulty: [] for difficulty, _ in TIERS}
+        # The AI writes the keys "1", "2", ... in order, and dictionaries
+        # keep that order, so no sorting is needed
+        for question in questions_dict.values():
+            # A difficulty we did not ask for means the answer is unusable
+            if question.difficulty not in by_difficulty:
+                logger.warning("Unknown difficulty %r in batch response", question.difficulty)
+                return None
+            
+            # Put the question in its difficulty group
+            by_difficulty[question.difficulty].append(question)
+        
+        # Build the standardized question objects, tier by tier
+        all_questions = []
+        for difficulty, number in TIERS:
+            # Each tier must have exactly the number of questions we asked for
+            if len(by_difficulty[difficulty]) != number:
+                logger.warning(
+                    "Batch response had %d %s questions instead of %d",
+                    len(by_difficulty[difficulty]), difficulty, number
+                )
+                return None
+            
+            # Add the questions of this tier to the quiz
+            append_tier(all_questions, by_difficulty[difficulty], difficulty)
+        
+        # Return the complete list of questions
+        return all_questions
+        
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        # The JSON was valid but not shaped like a quiz (missing field,
+        # a key that is not a number, ...)
+        logger.error("Unexpected batch response format: %s", e)
+        # Return None to indicate failure
+        return None
+
+async def generate_all_questions(topic, variant=1):
+    """
+    Generates all 10 questions of a quiz with a single request to Gemini.
+    
+    Args:
+        topic: The subject/topic for the questions
+        variant: Which version of the quiz this is (see MCQ_GENERATION_TEMPLATE)
+    
+    Returns:
+        list: The 10 question objects in quiz order (see build_batch_questions),
+              or None if generation failed
+    """
+    
+    try:
+        # Send the batch prompt to Gemini and await its answer,
+        # already parsed into a Python dictionary
+        questions_dict = await invoke_with_feedback(mcq_batch_chain, {
+            "topic": topic,     # The quiz topic
+            "variant": variant  # Quiz version
+        })
+        
+    except OutputParserException as e:
+        # If JSON parsing fails, log the error (and the raw answer at DEBUG level)
+        logger.error("JSON parsing error for batch questions: %s", e)
+        logger.debug("Raw response was: %s", e.llm_output)
         # Return None to indicate failure
         return None
         
     except Exception as e:
         # Catch any other errors (API errors, network issues, etc.)
-        print(f"Error generating {difficulty} questions: {e}")
+        logger.error("Error generating batch questions: %s", e)
         # Return None to indicate failure
         return None
+    
+    # Check the answer and turn it into question objects
+    return build_batch_questions(questions_dict)
 
 # ============================================================================
 # MAIN GENERATION FUNCTION
 # ============================================================================
 
-def generate_quiz(topic):
+async def generate_quiz_async(topic, variant=1):
     """
     Generates a complete quiz with 10 questions at mixed difficulty levels.
+    This is the async version used by the web app, which awaits it directly.
     - 5 Easy questions (questions 1-5)
     - 3 Medium questions (questions 6-8)
     - 2 Hard questions (questions 9-10)
+    All 10 are first asked for in one request. If that answer is unusable,
+    each difficulty level is generated separately instead.
     
     Args:
         topic: The subject/topic for the quiz
+        variant: Which version of the quiz to generate (1 by default)
+                 Asking again for the same topic and version is answered
+                 from the LLM cache
     
     Returns:
         dict: Contains 'success' (bool), 'questions' (list), and 'message' (str)
@@ -208,114 +820,67 @@ def generate_quiz(topic):
     # Clean up the topic string by removing extra whitespace
     topic = topic.strip()
     
-    # Initialize an empty list to hold all questions
-    all_questions = []
-    
     # ========================================
-    # STEP 1: Generate 5 Easy Questions
+    # STEP 1: Ask for all 10 questions in a single request
     # ========================================
     
-    print(f"Generating 5 EASY questions about: {topic}")
-    
-    # Call the helper function to generate easy questions
-    easy_questions = generate_questions_by_difficulty(topic, 5, "EASY")
+    # One request instead of three: one network round trip and one prompt
+    # for Gemini to read
+    logger.info("Generating 10 questions about: %s", topic)
+    all_questions = await generate_all_questions(topic, variant)
     
-    # Check if generation was successful
-    if easy_questions is None:
-        # Return error if easy questions failed to generate
+    # If the single request worked, the quiz is ready
+    if all_questions is not None:
+        # Log success message
+        logger.info("Successfully generated 10 questions about: %s", topic)
+        
+        # Return the complete quiz
         return {
-            "success": False,
-            "message": "Failed to generate easy questions. Please try again.",
-            "questions": []
+            "success": True,
+            "message": "Quiz generated successfully",
+            "questions": all_questions,
+            "topic": topic
         }
     
-    # Add each easy question to our list
-    # The questions are numbered 1-5 in the response
-    for key in sorted(easy_questions.keys(), key=lambda x: int(x)):
-        # Get the question data
-        question_data = easy_questions[key]
-        
-        # Create a standardized question object
-        question_obj = {
-            "question_number": len(all_questions) + 1,  # Sequential number (1-5)
-            "question": question_data["question"],       # The question text
-            "options": question_data["options"],         # The four options
-            "correct": question_data["correct"],         # The correct answer letter
-            "difficulty": "EASY"                         # Difficulty level
-        }
-        
-        # Add to our list of all questions
-        all_questions.append(question_obj)
+    # Otherwise fall back to one request per difficulty level (steps 2-4)
+    logger.warning("Single request failed, generating each difficulty level separately")
+    
+    # Initialize an empty list to hold all questions
+    all_questions = []
     
     # ========================================
-    # STEP 2: Generate 3 Medium Questions
+    # STEP 2: Generate all three difficulty levels at the same time
     # ========================================
     
-    print(f"Generating 3 MEDIUM questions about: {topic}")
-    
-    # Call the helper function to generate medium questions
-    medium_questions = generate_questions_by_difficulty(topic, 3, "MEDIUM")
-    
-    # Check if generation was successful
-    if medium_questions is None:
-        # Return error if medium questions failed to generate
-        return {
-            "success": False,
-            "message": "Failed to generate medium questions. Please try again.",
-            "questions": []
-        }
+    # The three requests do not depend on each other, so instead of waiting
+    # for Gemini three times in a row we send them together and wait once
+    # The quiz is then ready after the slowest request, not after all three
+    logger.info("Generating 5 EASY, 3 MEDIUM and 2 HARD questions about: %s", topic)
     
-    # Add each medium question to our list
-    for key in sorted(medium_questions.keys(), key=lambda x: int(x)):
-        # Get the question data
-        question_data = medium_questions[key]
-        
-        # Create a standardized question object
-        question_obj = {
-            "question_number": len(all_questions) + 1,  # Sequential number (6-8)
-            "question": question_data["question"],       # The question text
-            "options": question_data["options"],         # The four options
-            "correct": question_data["correct"],         # The correct answer letter
-            "difficulty": "MEDIUM"                       # Difficulty level
-        }
-        
-        # Add to our list of all questions
-        all_questions.append(question_obj)
+    # asyncio.gather runs one coroutine per row of the TIERS table
+    # concurrently and returns their results in the same order
+    results = await asyncio.gather(*(
+        generate_questions_by_difficulty(topic, number, difficulty, variant)
+        for difficulty, number in TIERS
+    ))
     
     # ========================================
-    # STEP 3: Generate 2 Hard Questions
+    # STEP 3: Add the questions of each level (EASY 1-5, MEDIUM 6-8, HARD 9-10)
     # ========================================
     
-    print(f"Generating 2 HARD questions about: {topic}")
-    
-    # Call the helper function to generate hard questions
-    hard_questions = generate_questions_by_difficulty(topic, 2, "HARD")
-    
-    # Check if generation was successful
-    if hard_questions is None:
-        # Return error if hard questions failed to generate
-        return {
-            "success": False,
-            "message": "Failed to generate hard questions. Please try again.",
-            "questions": []
-        }
-    
-    # Add each hard question to our list
-    for key in sorted(hard_questions.keys(), key=lambda x: int(x)):
-        # Get the question data
-        question_data = hard_questions[key]
-        
-        # Create a standardized question object
-        question_obj = {
-            "question_number": len(all_questions) + 1,  # Sequential number (9-10)
-            "question": question_data["question"],       # The question text
-            "options": question_data["options"],         # The four options
-            "correct": question_data["correct"],         # The correct answer letter
-            "difficulty": "HARD"                         # Difficulty level
-        }
+    # Go through the levels in the same order as the TIERS table
+    for (difficulty, _), questions_dict in zip(TIERS, results):
+        # Check if generation was successful
+        if questions_dict is None:
+            # Return error if this level's questions failed to generate
+            return {
+                "success": False,
+                "message": f"Failed to generate {difficulty.lower()} questions. Please try again.",
+                "questions": []
+            }
         
-        # Add to our list of all questions
-        all_questions.append(question_obj)
+        # Add this level's questions to our list
+        append_tier(all_questions, questions_dict.values(), difficulty)
     
     # ========================================
     # STEP 4: Verify we have exactly 10 questions
@@ -331,7 +896,7 @@ def generate_quiz(topic):
         }
     
     # Log success message
-    print(f"Successfully generated 10 questions about: {topic}")
+    logger.info("Successfully generated 10 questions about: %s", topic)
     
     # Return the complete quiz
     return {
@@ -341,13 +906,470 @@ def generate_quiz(topic):
         "topic": topic
     }
 
+async def generate_quiz_stream(topic, variant=1):
+    """
+    Generates the 10 quiz questions with one request and yields each one as
+    soon as Gemini has finished writing it, so a page can show question 1
+    while the rest are still being generated.
+    This is an async generator: use it with "async for".
+    
+    Args:
+        topic: The subject/topic for the quiz
+        variant: Which version of the quiz to generate (1 by default)
+    
+    Yields:
+        dict: One question object at a time, in quiz order (question_number 1-10)
+    
+    Raises:
+        ValueError: If the topic is empty or the answer is not a usable quiz
+                    (this includes msgspec.DecodeError for a broken question)
+    """
+    
+    # Check if the topic is empty or just whitespace
+    if not topic or not topic.strip():
+        raise ValueError("Please provide a topic for the quiz")
+    
+    # Clean up the topic string by removing extra whitespace
+    topic = topic.strip()
+    
+    # The parser turns the streamed text into finished questions
+    parser = QuestionStreamParser()
+    
+    # How many questions of each difficulty we still expect
+    remaining = dict(TIERS)
+    
+    # Number of questions yielded so far
+    count = 0
+    
+    # astream sends the same prompt as ainvoke but hands back the answer
+    # in small pieces while Gemini is still writing it
+    # (LangChain skips the LLM cache when streaming, so this always asks
+    # Gemini; get_quiz_stream checks the quiz cache before calling this)
+    logger.info("Streaming 10 questions about: %s", topic)
+    async for chunk in mcq_batch_stream_chain.astream({"topic": topic, "variant": variant}):
+        # Turn every question finished by this piece into a question object
+        for question in parser.feed(chunk):
+            # Questions are shown right away, so they can't be regrouped later
+            # The AI must stick to the 5/3/2 split it was asked for
+            if remaining.get(question.difficulty, 0) == 0:
+                raise ValueError(f"Unexpected {question.difficulty} question in the quiz")
+            remaining[question.difficulty] -= 1
+            
+            # Create and hand out the standardized question object
+            count += 1
+            yield {
+                "question_number": count,                # Sequential number (1-10)
+                "question": question.question,           # The question text
+                "options": question.options,             # The four options
+                "correct": question.correct,             # The correct answer letter
+                "difficulty": question.difficulty        # Difficulty level
+            }
+    
+    # Check that the answer did not stop early
+    if count != 10:
+        raise ValueError(f"Expected 10 questions but got {count}")
+    
+    # Log success message
+    logger.info("Successfully streamed 10 questions about: %s", topic)
+
+# How many quiz requests generate_quizzes sends to Gemini at the same time
+MAX_CONCURRENT_QUIZZES = 10
+
+async def generate_quizzes(topics, variant=1):
+    """
+    Generates one quiz for each topic in a list, for example for a whole
+    class at once. Instead of one quiz after the other, the requests are
+    sent together (at most MAX_CONCURRENT_QUIZZES at a time), so 30 topics
+    take about as long as 3 rounds of 10.
+    
+    Args:
+        topics: A list of quiz topics
+        variant: Which version of the quizzes to generate (1 by default)
+    
+    Returns:
+        list: One result per topic, in the same order, each shaped like the
+              result of generate_quiz_async
+    """
+    
+    # Clean up the topics; empty ones get an error result without a request
+    topics = [topic.strip() if topic else "" for topic in topics]
+    
+    # Each different topic is generated once, even if it is in the list twice
+    # (dict.fromkeys removes repeats and keeps the order)
+    to_generate = list(dict.fromkeys(topic for topic in topics if topic))
+    
+    # abatch runs the one-request quiz chain for every topic, with at most
+    # MAX_CONCURRENT_QUIZZES requests waiting on Gemini at once
+    # return_exceptions=True gives back the error for a failed topic instead
+    # of stopping the whole batch
+    logger.info("Generating quizzes for %d topics", len(to_generate))
+    answers = await mcq_batch_chain.abatch(
+        [{"topic": topic, "variant": variant} for topic in to_generate],
+        config={"max_concurrency": MAX_CONCURRENT_QUIZZES},
+        return_exceptions=True
+    )
+    
+    # Match each answer to its topic
+    quizzes = {}
+    for topic, answer in zip(to_generate, answers):
+        # A failed request (or invalid JSON) is tried again below
+        if isinstance(answer, Exception):
+            logger.error("Error generating quiz about %s: %s", topic, answer)
+            continue
+        
+        # Check the answer and turn it into question objects
+        all_questions = build_batch_questions(answer)
+        if all_questions is not None:
+            quizzes[topic] = {
+                "success": True,
+                "message": "Quiz generated successfully",
+                "questions": all_questions,
+                "topic": topic
+            }
+    
+    # Topics whose answer was unusable go through generate_quiz_async,
+    # which retries with feedback and then falls back to one request per
+    # difficulty level (these are run at the same time too)
+    failed = [topic for topic in to_generate if topic not in quizzes]
+    results = await asyncio.gather(
+        *(generate_quiz_async(topic, variant) for topic in failed)
+    )
+    for topic, result in zip(failed, results):
+        quizzes[topic] = result
+    
+    # Return the results in the same order as the topics
+    return [
+        quizzes[topic] if topic else {
+            "success": False,
+            "message": "Please provide a topic for the quiz",
+            "questions": []
+        }
+        for topic in topics
+    ]
+
+def generate_quiz(topic):
+    """
+    Synchronous wrapper around generate_quiz_async.
+    Use this from normal Python code (like the test function below) that is
+    not already running inside an event loop.
+    
+    Args:
+        topic: The subject/topic for the quiz
+    
+    Returns:
+        dict: Contains 'success' (bool), 'questions' (list), and 'message' (str)
+    """
+    
+    # Start an event loop, run the async generator to completion, and return its result
+    return asyncio.run(generate_quiz_async(topic))
+
+# ============================================================================
+# QUIZ CACHE (reuse quizzes for popular topics)
+# ============================================================================
+
+# How many different quizzes we keep for each topic
+# Serving a random one of these means players don't always see the same quiz
+QUIZZES_PER_TOPIC = 3
+
+# How many topics the cache can hold before the oldest topic is dropped
+MAX_CACHED_TOPICS = 512
+
+# How long (in seconds) a cached topic is reused before it is generated again
+QUIZ_CACHE_TTL = 3600
+
+# The cache itself: maps a lowercase topic to its saved quizzes
+# Each value looks like {"created_at": <time>, "quizzes": [<quiz dict>, ...]}
+# The web app runs on a single event loop per process, so no lock is needed
+_quiz_cache = {}
+
+# Quizzes that are being generated right now: maps (cache key, version) to
+# the task generating it
+# When several players ask for a new topic at the same moment, they all wait
+# for one generation instead of each sending the same requests to Gemini
+_quizzes_in_progress = {}
+
+async def generate_quiz_once(cache_key, topic, variant):
+    """
+    Generates a quiz, sharing the work with identical requests in progress.
+    
+    Args:
+        cache_key: The lowercase topic (see get_quiz)
+        topic: The subject/topic for the quiz
+        variant: Which version of the quiz to generate
+    
+    Returns:
+        dict: The result of generate_quiz_async (the same dict for everyone
+              who asked while it was being generated)
+    """
+    
+    # Join the generation already in progress for this quiz, if there is one
+    key = (cache_key, variant)
+    task = _quizzes_in_progress.get(key)
+    
+    # Otherwise start it as a task so other requests can wait for it too
+    # The task removes itself from the dictionary once the quiz is ready
+    if task is None:
+        task = asyncio.ensure_future(generate_quiz_async(topic, variant))
+        _quizzes_in_progress[key] = task
+        task.add_done_callback(lambda _: _quizzes_in_progress.pop(key, None))
+    
+    # shield: if this player gives up (closes the page), the generation
+    # keeps going for the others who are waiting for it
+    return await asyncio.shield(task)
+
+def find_cached_quiz(cache_key):
+    """
+    Looks up the saved quizzes for a topic (see get_quiz).
+    
+    Args:
+        cache_key: The lowercase topic
+    
+    Returns:
+        tuple: (quiz, variant) - a random saved quiz once QUIZZES_PER_TOPIC
+               are saved (else None), and the version to generate next
+    """
+    
+    # Look up the saved quizzes for this topic
+    entry = _quiz_cache.get(cache_key)
+    
+    # Throw the entry away if it is older than the time-to-live
+    if entry is not None and time.monotonic() - entry["created_at"] > QUIZ_CACHE_TTL:
+        del _quiz_cache[cache_key]
+        entry = None
+    
+    # If we already have enough quizzes for this topic, serve one of them
+    if entry is not None and len(entry["quizzes"]) >= QUIZZES_PER_TOPIC:
+        # Pick one of the saved quizzes at random
+        return random.choice(entry["quizzes"]), None
+    
+    # Otherwise the next version of the quiz for this topic should be made
+    # (version 1, 2, 3, ... so each saved quiz is a different one)
+    return None, len(entry["quizzes"]) + 1 if entry is not None else 1
+
+def remember_quiz(cache_key, result):
+    """
+    Saves a successful quiz in the cache for future players.
+    
+    Args:
+        cache_key: The lowercase topic
+        result: The successful result of generate_quiz_async
+    """
+    
+    # Look the entry up again: another request may have changed the
+    # cache while this one was waiting for the quiz
+    entry = _quiz_cache.get(cache_key)
+    
+    # Create the cache entry for this topic if it does not exist yet
+    if entry is None:
+        # Make room by dropping the oldest topic if the cache is full
+        # (dictionaries remember insertion order, so the first key is the oldest)
+        if len(_quiz_cache) >= MAX_CACHED_TOPICS:
+            del _quiz_cache[next(iter(_quiz_cache))]
+        
+        # Start a new empty entry for this topic
+        entry = {"created_at": time.monotonic(), "quizzes": []}
+        _quiz_cache[cache_key] = entry
+    
+    # Save the new quiz (only once, even if several requests waited for it)
+    if not any(quiz is result for quiz in entry["quizzes"]):
+        entry["quizzes"].append(result)
+
+async def get_quiz(topic):
+    """
+    Returns a quiz for the topic, reusing a cached one when possible.
+    The first few requests for a topic each generate a fresh quiz and save it.
+    Once QUIZZES_PER_TOPIC quizzes are saved, later requests get a random one
+    of them instantly instead of waiting several seconds for the LLM.
+    
+    Args:
+        topic: The subject/topic for the quiz
+    
+    Returns:
+        dict: Contains 'success' (bool), 'questions' (list), and 'message' (str)
+    """
+    
+    # Invalid topics are handled (and rejected) by the generator itself
+    if not topic or not topic.strip():
+        return await generate_quiz_async(topic)
+    
+    # Clean up the topic and build the cache key
+    # "Python", " python " and "PYTHON" should all share the same quizzes
+    topic = topic.strip()
+    cache_key = topic.lower()
+    
+    # Serve a saved quiz if there are enough of them for this topic
+    quiz, variant = find_cached_quiz(cache_key)
+    if quiz is not None:
+        # Return a copy that carries the topic exactly as this user typed it
+        return {**quiz, "topic": topic}
+    
+    # Otherwise generate the next version of the quiz for this topic
+    result = await generate_quiz_once(cache_key, topic, variant)
+    
+    # Only successful quizzes are worth keeping
+    if result["success"]:
+        # Save the new quiz for future players
+        remember_quiz(cache_key, result)
+        
+        # Return a copy that carries the topic exactly as this user typed it
+        return {**result, "topic": topic}
+    
+    # Return the error from the generator
+    return result
+
+async def get_quiz_stream(topic):
+    """
+    Streaming version of get_quiz: yields the questions one by one.
+    A cached quiz (or one another request is already generating) is sent
+    all at once. Otherwise the questions are streamed from Gemini as they are
+    written, and the finished quiz is saved in the cache like get_quiz does.
+    While it streams it counts as the generation in progress, so other
+    requests for the same quiz wait for it instead of asking Gemini again.
+    If the stream fails (bad answer, wrong difficulty split, API error), the
+    quiz is made by generate_quiz_async instead, with its retries, LLM cache
+    and per-difficulty fallback, and its questions are sent from number 1
+    again. A question_number of 1 after other questions means "start over".
+    This is an async generator: use it with "async for".
+    
+    Args:
+        topic: The subject/topic for the quiz
+    
+    Yields:
+        dict: One question object at a time (question_number 1-10)
+    
+    Raises:
+        ValueError: If the topic is empty or no quiz could be generated
+    """
+    
+    # Check if the topic is empty or just whitespace
+    if not topic or not topic.strip():
+        raise ValueError("Please provide a topic for the quiz")
+    
+    # Clean up the topic and build the cache key (see get_quiz)
+    topic = topic.strip()
+    cache_key = topic.lower()
+    
+    # Send a saved quiz right away if there are enough for this topic
+    quiz, variant = find_cached_quiz(cache_key)
+    if quiz is not None:
+        for question in quiz["questions"]:
+            yield question
+        return
+    
+    # Join a generation that is already running for this quiz instead of
+    # asking Gemini a second time (its questions arrive all at once)
+    key = (cache_key, variant)
+    if key in _quizzes_in_progress:
+        result = await generate_quiz_once(cache_key, topic, variant)
+        if not result["success"]:
+            raise ValueError(result["message"])
+        
+        # Save it and send all of its questions
+        remember_quiz(cache_key, result)
+        for question in result["questions"]:
+            yield question
+        return
+    
+    # Otherwise this stream is the generation in progress: other streams and
+    # get_quiz calls for the same quiz wait for this future (see
+    # generate_quiz_once), which gets the finished quiz's result
+    future = asyncio.get_running_loop().create_future()
+    _quizzes_in_progress[key] = future
+    
+    try:
+        # The questions streamed so far
+        questions = []
+        
+        try:
+            # Send every question the moment Gemini has finished writing it
+            async for question in generate_quiz_stream(topic, variant):
+                questions.append(question)
+                yield question
+            
+            # The finished quiz, shaped like the result of generate_quiz_async
+            result = {
+                "success": True,
+                "questions": questions,
+                "message": "Quiz generated successfully"
+            }
+            streamed = True
+        except Exception as e:
+            # Generate it normally instead (retries, LLM cache and the
+            # per-difficulty fallback)
+            # generate_quiz_async is called directly: generate_quiz_once
+            # would find this stream's own future and wait for itself
+            logger.warning("Streaming the quiz failed, generating it normally: %s", e)
+            result = await generate_quiz_async(topic, variant)
+            streamed = False
+        
+        # Hand the result to everyone who is waiting for this quiz
+        future.set_result(result)
+    
+    finally:
+        # This quiz is no longer being generated
+        if _quizzes_in_progress.get(key) is future:
+            del _quizzes_in_progress[key]
+        
+        # If the stream stopped early (the player left, or an error), the
+        # others waiting for it get a failed result instead of waiting forever
+        if not future.done():
+            future.set_result({
+                "success": False,
+                "message": "Failed to generate quiz. Please try again.",
+                "questions": []
+            })
+    
+    # The fallback could not make a quiz either
+    if not result["success"]:
+        raise ValueError(result["message"])
+    
+    # Save the finished quiz for future players
+    remember_quiz(cache_key, result)
+    
+    # The streamed questions were already sent; the fallback's are sent now
+    if not streamed:
+        for question in result["questions"]:
+            yield question
+
 # ============================================================================
 # TEST FUNCTION (for development/debugging)
 # ============================================================================
 
+async def print_streamed_quiz(topic):
+    """
+    Prints each question of a streamed quiz the moment it arrives.
+    
+    Args:
+        topic: The subject/topic for the quiz
+    
+    Returns:
+        int: How many questions were printed
+    """
+    
+    # Number of questions printed so far
+    count = 0
+    
+    # generate_quiz_stream hands out the questions one by one
+    async for q in generate_quiz_stream(topic):
+        count += 1
+        # Print question number and difficulty
+        print(f"\nQ{q['question_number']} [{q['difficulty']}]:")
+        # Print the question text
+        print(f"   {q['question']}")
+        # Print each option
+        for option_key, option_text in q["options"].items():
+            print(f"      {option_key.upper()}. {option_text}")
+        # Print the correct answer
+        print(f"   Correct Answer: {q['correct'].upper()}")
+        print("-" * 40)
+    
+    # Return the number of questions
+    return count
+
 def test_quiz_generation():
     """
     A simple test function to verify the quiz generation is working.
+    The questions are streamed, so each one is printed as soon as it is ready.
     Run this file directly to test: python mcq_generator.py
     """
     
@@ -361,30 +1383,17 @@ def test_quiz_generation():
     
     # Generate a quiz
     print(f"\nGenerating quiz about: {test_topic}\n")
-    result = generate_quiz(test_topic)
     
-    # Check if generation was successful
-    if result["success"]:
+    try:
+        # Stream the quiz and print the questions as they arrive
+        count = asyncio.run(print_streamed_quiz(test_topic))
+        
         # Print success message
         print("\nQuiz generated successfully!")
-        print(f"Total questions: {len(result['questions'])}")
-        print("-" * 60)
-        
-        # Print each question
-        for q in result["questions"]:
-            # Print question number and difficulty
-            print(f"\nQ{q['question_number']} [{q['difficulty']}]:")
-            # Print the question text
-            print(f"   {q['question']}")
-            # Print each option
-            for option_key, option_text in q["options"].items():
-                print(f"      {option_key.upper()}. {option_text}")
-            # Print the correct answer
-            print(f"   Correct Answer: {q['correct'].upper()}")
-            print("-" * 40)
-    else:
+        print(f"Total questions: {count}")
+    except Exception as e:
         # Print error message
-        print(f"\nQuiz generation failed: {result['message']}")
+        print(f"\nQuiz generation failed: {e}")
     
     # Print footer
     print("\n" + "=" * 60)
@@ -397,5 +1406,8 @@ def test_quiz_generation():
 
 # This block only runs if this file is executed directly (not imported)
 if __name__ == "__main__":
+    # Show the generator's progress messages (INFO and above) in the terminal
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    
     # Run the test function
     test_quiz_generation()
\ No newline at end of file
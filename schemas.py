@@ -0,0 +1,187 @@
+# ============================================================================
+# schemas.py
+# This file describes the JSON that each API route expects from the frontend
+# msgspec reads the request body and checks every field in one step (in C),
+# so the routes get clean, already validated data
+# ============================================================================
+
+# Import msgspec, a fast library for reading and checking JSON
+import msgspec
+
+# ============================================================================
+# REQUEST SCHEMAS
+# ============================================================================
+
+# Each schema is a msgspec Struct (similar to a dataclass)
+# - Missing fields get the default value ("" or an empty list)
+# - A field of the wrong type (e.g. a number instead of text) is rejected
+# - Unknown extra fields are ignored
+# - __post_init__ runs after the fields are filled in. It strips extra
+#   whitespace and raises ValueError with the message shown to the user,
+#   which msgspec turns into a msgspec.ValidationError
+
+class SignupRequest(msgspec.Struct):
+    """
+    JSON sent to /api/signup: {"username": "...", "password": "..."}
+    """
+    
+    # The desired username for the new account
+    username: str = ""
+    
+    # The password for the new account
+    password: str = ""
+    
+    def __post_init__(self):
+        # Clean up the username and password by removing extra whitespace
+        self.username = self.username.strip()
+        self.password = self.password.strip()
+        
+        # Validate that username is not empty
+        if not self.username:
+            raise ValueError("Username is required")
+        
+        # Validate that password is not empty
+        if not self.password:
+            raise ValueError("Password is required")
+        
+        # Check minimum length for username (at least 3 characters)
+        if len(self.username) < 3:
+            raise ValueError("Username must be at least 3 characters")
+        
+        # Check minimum length for password (at least 4 characters)
+        if len(self.password) < 4:
+            raise ValueError("Password must be at least 4 characters")
+
+class LoginRequest(msgspec.Struct):
+    """
+    JSON sent to /api/login: {"username": "...", "password": "..."}
+    """
+    
+    # The username entered by the user
+    username: str = ""
+    
+    # The password entered by the user
+    password: str = ""
+    
+    def __post_init__(self):
+        # Clean up the username and password
+        self.username = self.username.strip()
+        self.password = self.password.strip()
+        
+        # Validate that username is not empty
+        if not self.username:
+            raise ValueError("Username is required")
+        
+        # Validate that password is not empty
+        if not self.password:
+            raise ValueError("Password is required")
+
+class UpdateUsernameRequest(msgspec.Struct):
+    """
+    JSON sent to /api/user/username: {"new_username": "..."}
+    """
+    
+    # The new desired username
+    new_username: str = ""
+    
+    def __post_init__(self):
+        # Clean up the new username
+        self.new_username = self.new_username.strip()
+        
+        # Validate that new username is not empty
+        if not self.new_username:
+            raise ValueError("New username is required")
+        
+        # Check minimum length for username (at least 3 characters)
+        if len(self.new_username) < 3:
+            raise ValueError("Username must be at least 3 characters")
+
+class UpdatePasswordRequest(msgspec.Struct):
+    """
+    JSON sent to /api/user/password:
+    {"current_password": "...", "new_password": "..."}
+    """
+    
+    # The user's current password for verification
+    current_password: str = ""
+    
+    # The new desired password
+    new_password: str = ""
+    
+    def __post_init__(self):
+        # Clean up the passwords
+        self.current_password = self.current_password.strip()
+        self.new_password = self.new_password.strip()
+        
+        # Validate that current password is not empty
+        if not self.current_password:
+            raise ValueError("Current password is required")
+        
+        # Validate that new password is not empty
+        if not self.new_password:
+            raise ValueError("New password is required")
+        
+        # Check minimum length for new password (at least 4 characters)
+        if len(self.new_password) < 4:
+            raise ValueError("New password must be at least 4 characters")
+
+class GenerateGameRequest(msgspec.Struct):
+    """
+    JSON sent to /api/game/generate: {"topic": "..."}
+    """
+    
+    # The topic the quiz should be about
+    topic: str = ""
+    
+    def __post_init__(self):
+        # Clean up the topic
+        self.topic = self.topic.strip()
+        
+        # Validate that topic is not empty
+        if not self.topic:
+            raise ValueError("Topic is required")
+
+class StartGameRequest(msgspec.Struct):
+    """
+    JSON sent to /api/game/start: {"quiz_token": "..."}
+    """
+    
+    # The signed quiz sent at the end of /api/game/generate/stream
+    quiz_token: str = ""
+    
+    def __post_init__(self):
+        # Validate that the token is not empty
+        if not self.quiz_token:
+            raise ValueError("Quiz token is required")
+
+class SubmitGameRequest(msgspec.Struct):
+    """
+    JSON sent to /api/game/submit: {"answers": ["a", "b", ...], "topic": "..."}
+    """
+    
+    # The user's answers, one letter per question ("" if left unanswered)
+    answers: list[str] = msgspec.field(default_factory=list)
+    
+    # The quiz topic (optional, the one saved with the quiz is used if empty)
+    topic: str = ""
+    
+    def __post_init__(self):
+        # Clean up every answer the same way the correct answers are cleaned
+        # when the quiz is stored: no extra whitespace, lowercase, and only
+        # the first letter, so " A" or "a)" still count as the choice "a"
+        self.answers = [answer.strip().lower()[:1] for answer in self.answers]
+
+# ============================================================================
+# DECODERS
+# ============================================================================
+
+# A Decoder is set up once for its schema and reused for every request
+# decode() raises msgspec.DecodeError for a missing or broken body and
+# msgspec.ValidationError when a field is wrong
+signup_decoder = msgspec.json.Decoder(SignupRequest)
+login_decoder = msgspec.json.Decoder(LoginRequest)
+update_username_decoder = msgspec.json.Decoder(UpdateUsernameRequest)
+update_password_decoder = msgspec.json.Decoder(UpdatePasswordRequest)
+generate_game_decoder = msgspec.json.Decoder(GenerateGameRequest)
+start_game_decoder = msgspec.json.Decoder(StartGameRequest)
+submit_game_decoder = msgspec.json.Decoder(SubmitGameRequest)
@@ -0,0 +1,120 @@
+# ============================================================================
+# test_database_pool.py
+# Checks that get_conn() waits for a free pooled connection instead of
+# failing when every connection is in use
+# Run from the project folder with: python -m unittest
+# No MySQL server is needed: the pool is replaced by a small fake one
+# ============================================================================
+
+# Import queue for the fake pool's free connections
+import queue
+
+# Import threading to borrow connections from several threads at once
+import threading
+
+# Import unittest, Python's built-in test framework
+import unittest
+
+# Import PoolError, which mysql-connector raises when its pool is empty
+from mysql.connector.errors import PoolError
+
+# Import the module under test
+import database
+
+class FakeConnection:
+    """
+    Stands in for a pooled MySQL connection.
+    """
+    
+    def __init__(self, pool):
+        # The pool this connection goes back to
+        self.pool = pool
+        
+        # No transaction is ever left open by these tests
+        self.in_transaction = False
+    
+    def close(self):
+        # Like a real pooled connection, close() hands it back to the pool
+        self.pool.free.put(self)
+
+class FakePool:
+    """
+    Behaves like MySQLConnectionPool: get_connection() does not wait and
+    raises PoolError("pool exhausted") when no connection is free.
+    """
+    
+    def __init__(self, size):
+        # The connections that are free right now
+        self.free = queue.Queue()
+        for _ in range(size):
+            self.free.put(FakeConnection(self))
+    
+    def get_connection(self):
+        # Take a free connection without waiting (as mysql-connector does)
+        try:
+            return self.free.get(block=False)
+        except queue.Empty:
+            raise PoolError("Failed getting connection; pool exhausted")
+
+class GetConnTest(unittest.TestCase):
+
+    def setUp(self):
+        # Swap in a fake pool with the real pool size
+        self.real_pool = database._connection_pool
+        database._connection_pool = FakePool(database.SYNC_POOL_SIZE)
+    
+    def tearDown(self):
+        # Put the real pool back
+        database._connection_pool = self.real_pool
+    
+    def test_extra_caller_waits_for_a_free_connection(self):
+        # Set once every pooled connection has been borrowed
+        all_borrowed = threading.Barrier(database.SYNC_POOL_SIZE + 1)
+        
+        # Set when the holders may give their connections back
+        release = threading.Event()
+        
+        # Let the holders finish even if an assertion below fails
+        self.addCleanup(release.set)
+        
+        # What each holder got from get_conn()
+        held = []
+        
+        def hold_connection():
+            # Borrow a connection and keep it until the test says so
+            with database.get_conn() as connection:
+                held.append(connection)
+                all_borrowed.wait()
+                release.wait()
+        
+        # Borrow every connection of the pool
+        holders = [threading.Thread(target=hold_connection, daemon=True) for _ in range(database.SYNC_POOL_SIZE)]
+        for thread in holders:
+            thread.start()
+        all_borrowed.wait()
+        
+        # What the extra caller got from get_conn()
+        extra = []
+        
+        def borrow_one_more():
+            with database.get_conn() as connection:
+                extra.append(connection)
+        
+        # The extra caller must wait, not get None ("pool exhausted")
+        extra_thread = threading.Thread(target=borrow_one_more, daemon=True)
+        extra_thread.start()
+        extra_thread.join(timeout=0.2)
+        self.assertTrue(extra_thread.is_alive())
+        self.assertEqual(extra, [])
+        
+        # Once the holders give their connections back, it gets one
+        release.set()
+        extra_thread.join(timeout=5)
+        for thread in holders:
+            thread.join(timeout=5)
+        self.assertFalse(extra_thread.is_alive())
+        self.assertIsNotNone(extra[0])
+        self.assertNotIn(None, held)
+
+if __name__ == "__main__":
+    unittest.main()